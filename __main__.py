@@ -1,9 +1,39 @@
-from quadrillion import Quadrillion
-from quadrillion_csp import QuadrillionCSPAdapter
-from graphic_display import QuadrillionSolverGraphicDisplay
-import tkinter
-
-quadrillion = Quadrillion()
-quadrillion_csp = QuadrillionCSPAdapter(quadrillion)
-view = QuadrillionSolverGraphicDisplay(quadrillion_csp)
-tkinter.mainloop()
+"""
+Runs the quadrillion game with its GUI, or solves saved games without a display if their paths are given:
+
+    python quadrillion [paths ...] [--solver SOLVER] [--workers N] [--timeout SECONDS]
+"""
+import argparse
+from batch_solve import SOLVERS
+
+
+def main_gui():
+    # the GUI modules are imported here, so tkinter is not needed to solve saved games
+    from csp import CSPSolver, Budget, CancellationToken
+    from quadrillion import Quadrillion
+    from quadrillion_csp import QuadrillionCSPAdapter
+    from solution_cache import SolutionCache
+    from graphic_display import QuadrillionSolverGraphicDisplay
+    import tkinter
+
+    quadrillion = Quadrillion()
+    cancellation_token = CancellationToken()
+    solver = CSPSolver(budget=Budget(cancellation_token=cancellation_token))
+    quadrillion_csp = QuadrillionCSPAdapter(quadrillion, solver, solution_cache=SolutionCache(), collect_stats=True)
+    view = QuadrillionSolverGraphicDisplay(quadrillion_csp, cancellation_token)
+    tkinter.mainloop()
+
+
+parser = argparse.ArgumentParser(prog='quadrillion', description='Play quadrillion or solve saved games.')
+parser.add_argument('paths', nargs='*', help='saved games (.pickle files) or directories of saved games to be '
+                                             'solved without a display. The GUI is opened if none is given.')
+parser.add_argument('--solver', choices=SOLVERS, default='bitboard', help='the solver of the saved games.')
+parser.add_argument('--workers', type=int, help='the number of processes solving the saved games.')
+parser.add_argument('--timeout', type=float, help='the maximum time in seconds of solving each saved game.')
+args = parser.parse_args()
+
+if args.paths:
+    import batch_solve
+    batch_solve.main(args)
+else:
+    main_gui()
@@ -0,0 +1,123 @@
+"""
+Solves saved games without a display. Each game is solved in a separate process and the result of each game
+is printed as a JSON line as soon as it is solved:
+
+    {"name": ..., "solvable": true/false/null, "placements": {shape name: [[y, x], ...]}, "time": ..., "nodes": ...}
+
+solvable is null if the solver gave up (see Budget) and the placements are null if the game is not solved.
+This module must not import tkinter (directly or indirectly).
+"""
+import json
+import pathlib
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from csp import CSPSolver, DLXSolver, RestartSolver, MostConstrainedItem, Budget
+from quadrillion import Quadrillion
+from quadrillion_data import SHAPES, GRIDS
+from quadrillion_csp import QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter
+from quadrillion_exception import *
+
+# each solver is given as (adapter class, solver factory taking a Budget)
+SOLVERS = {'sets': (QuadrillionCSPAdapter, lambda budget: CSPSolver(budget=budget)),
+           'bitboard': (QuadrillionBitboardCSPAdapter, lambda budget: CSPSolver(budget=budget)),
+           'dlx': (QuadrillionCSPAdapter, DLXSolver),
+           'bitboard-dlx': (QuadrillionBitboardCSPAdapter, DLXSolver),
+           'cell-first': (QuadrillionBitboardCSPAdapter, lambda budget: CSPSolver(MostConstrainedItem(), budget)),
+           'restarts': (QuadrillionBitboardCSPAdapter, lambda budget: RestartSolver(budget=budget))}
+
+
+def game_files(paths):
+    """
+    :param paths: paths of saved games or of directories containing saved games (.pickle files).
+    :returns: a list of the paths of all saved games. The .pickle files in the directories that are pickles of
+    something else (see is_game_file) are skipped.
+    """
+    files = []
+    for path in map(pathlib.Path, paths):
+        files.extend([file for file in sorted(path.glob('*.pickle')) if is_game_file(file)]
+                     if path.is_dir() else [path])
+    return files
+
+
+def is_game_file(game_file):
+    """
+    :returns: False if the input file is a pickle of something other than saved game configs (like the
+    solutions cache), and True otherwise. Files that cannot be loaded are considered games, so that the error
+    of loading them is reported by solve_game.
+    """
+    try:
+        load_game_configs(game_file)
+    except ValueError:
+        return False
+    except Exception:
+        pass
+    return True
+
+
+def load_game_configs(game_file):
+    """
+    :returns: the dictionary of the configs of the items saved in the input file (see DotsSetFactory.save_configs).
+    :raises ValueError: if the file is a pickle of something other than saved game configs.
+    """
+    with pathlib.Path(game_file).open(mode='rb') as f:
+        configs = pickle.load(f)
+    if not isinstance(configs, dict) or not configs or not configs.keys() <= SHAPES.keys() | GRIDS.keys():
+        raise ValueError('{} is not a saved game'.format(game_file))
+    return configs
+
+
+def solve_game(game_file, solver='bitboard', timeout=None):
+    """
+    :param game_file: the path of a saved game.
+    :param solver: the name of one of SOLVERS.
+    :param timeout: the maximum time in seconds of the search, or None to not bound it.
+    :returns: a dictionary of the result of solving the game (see the module documentation). If the game cannot
+    be loaded or solved, it also has an 'error' message.
+    """
+    game_file = pathlib.Path(game_file)
+    result = {'name': game_file.stem, 'solvable': None, 'placements': None, 'time': 0.0, 'nodes': 0}
+    adapter_class, solver_factory = SOLVERS[solver]
+    adapter = None
+    start_time = time.perf_counter()
+    try:
+        load_game_configs(game_file)
+        quadrillion = Quadrillion()
+        # saved games are loaded relative to SAVE_PATH, which is ignored for absolute paths
+        quadrillion.load_game(str(game_file.resolve().with_suffix('')))
+        adapter = adapter_class(quadrillion, solver_factory(Budget(timeout)), collect_stats=True)
+        adapter.solve()
+        result['solvable'] = True
+        result['placements'] = {shape.name: sorted(shape) for shape in sorted(quadrillion.shapes,
+                                                                               key=lambda shape: shape.name)}
+    except NoSolutionException:
+        result['solvable'] = False
+    except SearchAbortedException:
+        pass
+    except Exception as exception:
+        result['error'] = '{}: {}'.format(type(exception).__name__, exception)
+    result['time'] = time.perf_counter() - start_time
+    if adapter is not None and adapter.stats is not None:
+        result['nodes'] = adapter.stats.counters['nodes']
+    return result
+
+
+def solve_games(paths, solver='bitboard', max_workers=None, timeout=None):
+    """
+    A generator that solves the saved games in the input paths in a pool of processes, and yields
+    the result of each game (see solve_game) as soon as it is solved.
+    :param max_workers: the number of processes, by default the number of processors on the machine.
+    """
+    with ProcessPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(solve_game, game_file, solver, timeout) for game_file in game_files(paths)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(args):
+    """
+    prints the results of solving the games in args.paths as JSON lines.
+    :param args: the parsed command line arguments (see __main__.py).
+    """
+    for result in solve_games(args.paths, args.solver, args.workers, args.timeout):
+        print(json.dumps(result), flush=True)
@@ -0,0 +1,167 @@
+"""
+Measures the wall time and the number of search nodes needed by the quadrillion csp adapters to solve
+the saved games, the default board and a few generated hard boards. Run it from the quadrillion folder:
+
+    python benchmark.py [-a ADAPTER ...] [-r REPEATS] [--save-baseline FILE] [--check-baseline FILE]
+
+The median and the 95th percentile of the wall times of each board are reported with its number of nodes.
+The results can be saved as a JSON baseline, and a later run checked against it fails (with exit code 1)
+if the median time or the number of nodes of any board regresses past the threshold.
+"""
+import sys
+import json
+import math
+import random
+import argparse
+import statistics
+import time
+from csp import CSPSolver, DLXSolver, RestartSolver, MostConstrainedItem
+from dots_set import Config
+from quadrillion import Quadrillion
+from quadrillion_csp import QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter
+from quadrillion_data import SAVE_PATH
+
+# each adapter is given as (adapter class, solver factory)
+ADAPTERS = {'sets': (QuadrillionCSPAdapter, CSPSolver),
+            'bitboard': (QuadrillionBitboardCSPAdapter, CSPSolver),
+            'dlx': (QuadrillionCSPAdapter, DLXSolver),
+            'bitboard-dlx': (QuadrillionBitboardCSPAdapter, DLXSolver),
+            'cell-first': (QuadrillionBitboardCSPAdapter, lambda: CSPSolver(MostConstrainedItem())),
+            'restarts': (QuadrillionBitboardCSPAdapter, RestartSolver)}
+
+# the locations of the 4 grids on a board
+GRIDS_LOCATIONS = ((1, 4), (1, 8), (5, 4), (5, 8))
+
+
+def saved_games():
+    return sorted(file.stem for file in SAVE_PATH.iterdir() if file.name.startswith('game'))
+
+
+def saved_game_board(game_file):
+    def board():
+        quadrillion = Quadrillion()
+        quadrillion.load_game(game_file)
+        return quadrillion
+    return board
+
+
+def generated_board(seed):
+    """
+    :returns: a function that creates a board whose grids are randomly placed, flipped and rotated
+    based on the input seed.
+    """
+    def board():
+        rand = random.Random(seed)
+        quadrillion = Quadrillion()
+        grids = sorted(quadrillion.grids, key=lambda grid: grid.name)
+        for grid, location in zip(grids, rand.sample(GRIDS_LOCATIONS, len(GRIDS_LOCATIONS))):
+            grid.config = Config(rand.randrange(2), rand.randrange(4), location)
+        return quadrillion
+    return board
+
+
+def hard_generated_boards(nr_boards=3, nr_candidates=20, seed=0):
+    """
+    :returns: a dictionary of the nr_boards generated boards that need the most search nodes by the bitboard
+    adapter among nr_candidates boards generated with the seeds following the input seed.
+    """
+    candidates = {'generated{}'.format(board_seed): generated_board(board_seed)
+                  for board_seed in range(seed, seed + nr_candidates)}
+    nr_nodes = {name: solve(board(), *ADAPTERS['bitboard'])[1] for name, board in candidates.items()}
+    return {name: candidates[name] for name in sorted(candidates, key=nr_nodes.get, reverse=True)[:nr_boards]}
+
+
+def benchmark_boards():
+    """
+    :returns: a dictionary of board names and functions that create them.
+    """
+    boards = {game_file: saved_game_board(game_file) for game_file in saved_games()}
+    boards['default'] = Quadrillion
+    boards.update(hard_generated_boards())
+    return boards
+
+
+def solve(quadrillion, adapter_class, solver_factory):
+    """
+    :returns: the time in seconds needed to solve the input board from scratch and the number of search nodes.
+    """
+    adapter = adapter_class(quadrillion, solver_factory(), collect_stats=True)
+    start_time = time.perf_counter()
+    adapter.solve()
+    return time.perf_counter() - start_time, adapter.stats.counters['nodes']
+
+
+def percentile(values, percent):
+    """
+    :returns: the nearest-rank percentile of the input values.
+    """
+    values = sorted(values)
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def run(adapters, boards, repeats):
+    """
+    :returns: a dictionary of the results of each adapter on each board as
+    {adapter: {board: {'median': seconds, 'p95': seconds, 'nodes': number}}}
+    """
+    results = {adapter: dict() for adapter in adapters}
+    for board_name, board in boards.items():
+        for adapter in adapters:
+            measurements = [solve(board(), *ADAPTERS[adapter]) for _ in range(repeats)]
+            times = [solve_time for solve_time, _ in measurements]
+            result = {'median': statistics.median(times), 'p95': percentile(times, 95), 'nodes': measurements[0][1]}
+            results[adapter][board_name] = result
+            print('{:<12}{:<14}{median:>10.4f}{p95:>10.4f}{nodes:>10}'.format(board_name, adapter, **result))
+    return results
+
+
+def regressions(results, baseline, threshold=0.25, min_slack=0.005):
+    """
+    compares the input results with the baseline results of the same adapters and boards.
+    :param threshold: the allowed relative increase of the median time and the number of nodes.
+    :param min_slack: the allowed absolute increase of the median time in seconds, which hides the timing
+    noise of the boards that are solved very fast.
+    :returns: a list of messages describing the regressions.
+    """
+    messages = []
+    for adapter, boards_results in results.items():
+        for board_name, result in boards_results.items():
+            base = baseline.get(adapter, dict()).get(board_name)
+            if base is None:
+                continue
+            if result['median'] > base['median'] * (1 + threshold) + min_slack:
+                messages.append('{} {}: median time {:.4f}s regressed from {:.4f}s'.format(
+                    board_name, adapter, result['median'], base['median']))
+            if result['nodes'] > base['nodes'] * (1 + threshold):
+                messages.append('{} {}: {} nodes regressed from {}'.format(
+                    board_name, adapter, result['nodes'], base['nodes']))
+    return messages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the quadrillion solvers.')
+    parser.add_argument('-a', '--adapter', action='append', choices=ADAPTERS,
+                        help='an adapter to benchmark (can be repeated), bitboard by default.')
+    parser.add_argument('-r', '--repeats', type=int, default=5, help='the number of times each board is solved.')
+    parser.add_argument('--save-baseline', metavar='FILE', help='saves the results as a JSON baseline.')
+    parser.add_argument('--check-baseline', metavar='FILE', help='fails if the results regress from a baseline.')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='the allowed relative regression from the baseline.')
+    args = parser.parse_args(argv)
+
+    print('{:<12}{:<14}{:>10}{:>10}{:>10}'.format('board', 'adapter', 'median', 'p95', 'nodes'))
+    results = run(args.adapter or ['bitboard'], benchmark_boards(), args.repeats)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.check_baseline:
+        with open(args.check_baseline) as f:
+            messages = regressions(results, json.load(f), args.threshold)
+        for message in messages:
+            print('REGRESSION ' + message)
+        return 1 if messages else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,125 @@
+import time
+import random
+import itertools
+import multiprocessing
 from abc import ABC, abstractmethod
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager, closing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+class _Unknown:
+    def __repr__(self):
+        return 'UNKNOWN'
+
+
+# returned by solvers that gave up the search before finding a solution or proving that there is not any
+UNKNOWN = _Unknown()
+
+
+class BudgetExhausted(Exception):
+    """
+    raised by a search when its Budget is exhausted.
+    """
+    pass
+
+
+class CancellationToken:
+    """
+    A token passed (in a Budget) to a search to cancel it from another thread or process.
+    """
+    def __init__(self, parent=None):
+        """
+        :param parent: an optional CancellationToken that cancels this token too.
+        """
+        self._event = multiprocessing.Event()  # can be shared with the processes of ParallelSolver
+        self._parent = parent
+
+    def cancel(self):
+        self._event.set()
+
+    def reset(self):
+        """
+        allows the token to be reused by a new search after it was cancelled.
+        """
+        self._event.clear()
+
+    @property
+    def is_cancelled(self):
+        return self._event.is_set() or (self._parent is not None and self._parent.is_cancelled)
+
+
+class Budget:
+    """
+    Bounds the work of a search by a timeout, a maximum number of search nodes and a cancellation token.
+    Any of them can be None to not bound the search by it.
+    """
+    def __init__(self, timeout=None, max_nodes=None, cancellation_token=None):
+        """
+        :param timeout: the maximum wall-clock time of the search in seconds.
+        :param max_nodes: the maximum number of tried assignments.
+        :param cancellation_token: a CancellationToken that cancels the search.
+        """
+        self.timeout = timeout
+        self.max_nodes = max_nodes
+        self.cancellation_token = cancellation_token
+        self.deadline = None
+
+    def start(self):
+        """
+        sets the deadline (as returned by time.time) of a search starting now.
+        """
+        self.deadline = time.time() + self.timeout if self.timeout is not None else None
+
+    def check(self, nr_nodes):
+        """
+        :raises BudgetExhausted: if the search with the input number of nodes should be stopped.
+        """
+        if ((self.max_nodes is not None and nr_nodes > self.max_nodes)
+                or (self.deadline is not None and time.time() > self.deadline)
+                or (self.cancellation_token is not None and self.cancellation_token.is_cancelled)):
+            raise BudgetExhausted()
+
+
+class SearchStats:
+    """
+    Named counters and timings (in seconds) of a search, collected by solvers and CSPs.
+    """
+    def __init__(self, *counters):
+        """
+        :param counters: names of counters to be reported even if they are never counted.
+        """
+        self.counters = dict.fromkeys(counters, 0)
+        self.timings = dict()
+
+    def count(self, counter, number=1):
+        self.counters[counter] = self.counters.get(counter, 0) + number
+
+    @contextmanager
+    def timer(self, timing):
+        """
+        adds the time spent in the with block to the input timing.
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[timing] = self.timings.get(timing, 0) + time.perf_counter() - start_time
+
+    def as_dict(self):
+        """
+        :returns: a flat dictionary of all counters and timings, the names of timings end with '_time'.
+        """
+        return dict(self.counters, **{timing + '_time': seconds for timing, seconds in self.timings.items()})
 
 
 class CSP(ABC):
     """
     A simple abstract class for constraint satisfaction problems
     """
+    # a SearchStats object updated by the solvers and the CSP itself, or None to not collect statistics
+    stats = None
+
     @property
     @abstractmethod
     def variables(self):
@@ -48,11 +163,61 @@ class CSP(ABC):
         """
         pass
 
+    def inconsistent_values(self, assignment, variables, domains):
+        """
+        Used by CSPSolver to prune the domains in place after registering the current assignments.
+        :param assignment: a single tuple containing (variable, assignment) of one of the registered assignments.
+        :param variables: the unassigned variables whose values should be checked.
+        :param domains: a dictionary containing variables and their current possible values.
+        :returns: an iterable of (variable, values) tuples with the values inconsistent with the input
+        assignment. Tuples with other variables and already removed values are ignored, so adapters can
+        report the values that the input assignment removes without checking the domains.
+        By default, all values of the input variables that are not consistent with the registered
+        assignments are returned.
+        """
+        return [(var, [val for val in domains[var] if not self.is_consistent_assignment((var, val))])
+                for var in variables]
 
-class CSPSolver:
+    def value_items(self, value):
+        """
+        Used by exact cover solvers (like DLXSolver) that see the problem as: each variable is assigned
+        exactly one value, and each item in the values of the domains is covered by exactly one
+        of the assigned values.
+        :param value: a value in the domain of some variable.
+        :returns: an iterable of the items covered by the input value. By default,
+        values are iterables of items.
+        """
+        return value
+
+    def state_key(self, assignments):
+        """
+        Used by CSPSolver to remember, in its TranspositionTable, the subproblems that it found to have no solution.
+        :param assignments: the current (forward checked) assignments.
+        :returns: a hashable key of the subproblem of the unassigned variables, such that subproblems with
+        the same key have the same solutions (even if they are reached by different assignments), or None to not
+        remember the subproblem. By default, None.
+        """
+        return None
+
+    def picklable(self):
+        """
+        Used by solvers that search in other processes (like ParallelSolver).
+        :returns: an equivalent CSP that can be pickled compactly. By default, the CSP itself.
+        """
+        return self
+
+    def from_picklable_solution(self, solution):
+        """
+        :param solution: a solution of the CSP returned by picklable
+        :returns: the corresponding solution of this CSP
+        """
+        return solution
+
+
+class Solver(ABC):
     """
-    An implementation of the backtracking search algorithm as described in
-    the book "AI, a Modern Approach", ed. 3, ch. 6.
+    A base class for solvers of CSP objects. A solver can return the first found solution,
+    iterate over all solutions or count them.
     """
     def __call__(self, csp):
         """
@@ -60,54 +225,211 @@ class CSPSolver:
         indicated in CSP abstract class.
         :returns the first found solution or None if there is not any. The solution is
         returned as a dictionary containing variables and the corresponding values.
+        UNKNOWN is returned if the budget of the solver is exhausted before the search ends.
+        """
+        try:
+            return next(self.iter_solutions(csp), None)
+        except BudgetExhausted:
+            return UNKNOWN
+
+    def iter_solutions(self, csp):
+        """
+        A generator that lazily yields all solutions of the input csp one by one, so memory
+        stays flat however many solutions there are.
+        :raises BudgetExhausted: if the budget of the solver is exhausted before all solutions are found.
+        """
+        for search_state in self._search(csp):
+            yield self._get_solution(search_state)
+
+    def count_solutions(self, csp, limit=None):
+        """
+        counts the solutions of the input csp without building a dictionary for each solution.
+        :param limit: if given, the counting stops after finding that many solutions.
+        :returns: the number of solutions (or limit if there are more solutions), or UNKNOWN if the budget
+        of the solver is exhausted before they are all counted.
+        """
+        nr_solutions = 0
+        try:
+            for _ in self._search(csp):
+                nr_solutions += 1
+                if nr_solutions == limit:
+                    break
+        except BudgetExhausted:
+            return UNKNOWN
+        return nr_solutions
+
+    @abstractmethod
+    def _search(self, csp):
+        """
+        A generator that yields the internal search state at each found solution.
+        """
+        pass
+
+    @abstractmethod
+    def _get_solution(self, search_state):
+        """
+        :returns: the solution dictionary corresponding to a search state yielded by _search
+        """
+        pass
+
+
+class CSPSolver(Solver):
+    """
+    An implementation of the backtracking search algorithm as described in
+    the book "AI, a Modern Approach", ed. 3, ch. 6.
+    The number of tried assignments (search nodes) of the last search is kept in nr_nodes.
+    """
+    def __init__(self, branching=None, budget=None, transposition_table_size=2**16):
+        """
+        :param branching: the strategy that chooses the assignments tried at each step of the search
+        (like MostConstrainedItem). MinimumRemainingValues is used by default.
+        :param budget: an optional Budget of each search. It is checked at each search node.
+        :param transposition_table_size: the maximum number of subproblems without solutions remembered
+        during each search (see CSP.state_key and TranspositionTable).
+        """
+        self.branching = branching if branching else MinimumRemainingValues()
+        self.budget = budget
+        self.nr_nodes = 0
+        self.transposition_table = TranspositionTable(transposition_table_size)
+
+    def _search(self, csp):
+        if self.budget is not None:
+            self.budget.start()
+        if self._set_csp(csp):
+            yield from self.back_tracking_solutions(dict(), self._trailed_domains(self.domains))
+
+    def _get_solution(self, assignments):
+        return dict(assignments)
+
+    def _set_csp(self, csp):
+        """
+        :returns: False if it is already known that the csp has no solution
         """
         self.csp = csp
         self.variables = csp.variables
         self.domains = csp.domains
+        self.stats = csp.stats
+        self.nr_nodes = 0
+        self.transposition_table.clear()
         # ensure that each variable has a non-empty domain
-        for shape in self.domains:
-            if not self.domains[shape]:
-                return None
-        return self.back_tracking_search(dict(), self.domains)
+        for var in self.variables:
+            if not self.domains.get(var):
+                return False
+        return True
+
+    def subproblems(self, csp, depth):
+        """
+        Splits the search space of the csp by assigning all possible values to the first depth
+        variables that the search would assign.
+        :returns: a generator of (assignments, domains) pairs, where the domains of the unassigned variables
+        are forward checked against the assignments. Searching from all these pairs covers the whole search space.
+        """
+        if self._set_csp(csp):
+            yield from self._subproblems(dict(), self._trailed_domains(self.domains), depth)
+
+    def subproblem_solutions(self, csp, assignments, domains):
+        """
+        searches the solutions of one of the subproblems of the csp (see back_tracking_solutions).
+        The budget (if any) is expected to be already started when the csp was split.
+        """
+        self._set_csp(csp)
+        yield from self.back_tracking_solutions(assignments, self._trailed_domains(domains))
+
+    def _trailed_domains(self, domains):
+        return self.branching.trailed_domains(self.csp, domains)
+
+    def _subproblems(self, assignments, domains, depth):
+        if len(assignments) == len(self.variables) or depth == 0:
+            yield dict(assignments), domains.copy(set(domains.keys()) - set(assignments.keys()))
+            return
+        old_vars = set(assignments.keys())
+        for var, val in self.branching.branches(assignments, domains):
+            assignments[var] = val
+            trail_mark = domains.mark()
+            if self.forward_check(assignments, domains, old_vars):
+                yield from self._subproblems(assignments, domains, depth - 1)
+            domains.undo(trail_mark)
+            for new_var in set(assignments.keys()) - old_vars:
+                del assignments[new_var]
 
     def back_tracking_search(self, assignments, domains):
         """
-        The recursive back-tracking search method
+        The back-tracking search method
+        :returns: the first solution found starting from the input assignments and domains or None.
+        """
+        for solution in self.back_tracking_solutions(assignments, self._trailed_domains(domains)):
+            return dict(solution)
+        return None  # Failure
+
+    def back_tracking_solutions(self, assignments, domains):
+        """
+        The recursive back-tracking search generator. It yields the input assignments dictionary
+        each time it is completed to a solution, and restores it before continuing the search.
+        :param domains: a TrailedDomains object which is pruned in place and restored on backtracking.
         """
         if len(assignments) == len(self.variables):
-            return assignments
-        elif not domains:
-            return None
-        var = self.select_unassigned_variable(assignments, domains)
+            yield assignments
+            return
         old_vars = set(assignments.keys())
-        for val in domains[var]:
+        for var, val in self.branching.branches(assignments, domains):
+            self.nr_nodes += 1
+            if self.stats is not None:
+                self.stats.count('nodes')
+            if self.budget is not None:
+                self.budget.check(self.nr_nodes)
             assignments[var] = val
-            new_domains = self.forward_check(assignments, domains)
-            solution = self.back_tracking_search(assignments, new_domains)
-            if solution:
-                return solution
+            trail_mark = domains.mark()
+            if self.forward_check(assignments, domains, old_vars):
+                yield from self._unless_known_to_fail(assignments, domains)
+            elif self.stats is not None:
+                self.stats.count('backtracks')
+            domains.undo(trail_mark)
             for new_var in set(assignments.keys()) - old_vars:
                 del assignments[new_var]
-        return None  # Failure
 
-    def forward_check(self, assignments, domains):
+    def _unless_known_to_fail(self, assignments, domains):
+        """
+        continues the search from the input assignments (see back_tracking_solutions) unless the transposition
+        table has their subproblem. If the subproblem is completely searched without finding a solution,
+        it is added to the transposition table.
+        """
+        key = self.csp.state_key(assignments) if self.transposition_table.max_size else None
+        if key is None:
+            yield from self.back_tracking_solutions(assignments, domains)
+            return
+        if self.transposition_table.has_failed(key):
+            if self.stats is not None:
+                self.stats.count('transposition_hits')
+            return
+        if self.stats is not None:
+            self.stats.count('transposition_misses')
+        is_solved = False
+        for solution in self.back_tracking_solutions(assignments, domains):
+            is_solved = True
+            yield solution
+        if not is_solved:
+            self.transposition_table.add_failure(key)
+
+    def forward_check(self, assignments, domains, old_vars):
         """
         A function that should be called at the begging of each search recursion to
         eliminate assignments inconsistent with the current assignment from the search space.
-        :return: a new domains dictionary where all the assignments are consistent with
-        the input assignments or None if no solution is possible given the input assignments and domains.
-        """
-        if self.csp.register_current_assignments(assignments, domains):
-            new_domains = dict()
-            for var in set(domains.keys()) - set(assignments.keys()):
-                new_domains[var] = set()
-                for val in domains[var]:
-                    if self.csp.is_consistent_assignment((var, val)):
-                        new_domains[var].add(val)
-                if not new_domains[var]:
-                    return None
-            return new_domains
-        return None
+        The inconsistent values are removed in place from the domains, so domains.undo must be
+        called on backtracking.
+        :param old_vars: the variables that were assigned (and forward checked) before.
+        :return: False if no solution is possible given the input assignments and domains.
+        """
+        if not self.csp.register_current_assignments(assignments, domains):
+            return False
+        unassigned_vars = set(domains.keys()) - set(assignments.keys())
+        for var in set(assignments.keys()) - old_vars:  # the new and the inferred assignments
+            domains.assign(var, assignments[var])
+            for other_var, values in self.csp.inconsistent_values((var, assignments[var]), unassigned_vars, domains):
+                if other_var in unassigned_vars:
+                    removed_values = domains.remove(other_var, values)
+                    if self.stats is not None:
+                        self.stats.count('pruned_values', len(removed_values))
+        return all(domains[var] for var in unassigned_vars)
 
     @staticmethod
     def select_unassigned_variable(assignments, domains):
@@ -115,4 +437,541 @@ class CSPSolver:
         Selects the next variable to be assigned by the minimum remaining values heuristic
         :return: the variable with the minimum remaining values
         """
-        return min(set(domains.keys()) - set(assignments.keys()), key=lambda var: len(domains[var]))
\ No newline at end of file
+        return min(set(domains.keys()) - set(assignments.keys()), key=lambda var: len(domains[var]))
+
+
+class TranspositionTable:
+    """
+    A bounded set of the keys of subproblems (see CSP.state_key) that were found to have no solution.
+    The least recently used keys are evicted first.
+    """
+    def __init__(self, max_size=2**16):
+        self.max_size = max_size
+        self._failures = OrderedDict()
+
+    def has_failed(self, key):
+        if key in self._failures:
+            self._failures.move_to_end(key)
+            return True
+        return False
+
+    def add_failure(self, key):
+        self._failures[key] = None
+        if len(self._failures) > self.max_size:
+            self._failures.popitem(last=False)
+
+    def __len__(self):
+        return len(self._failures)
+
+    def clear(self):
+        self._failures.clear()
+
+
+class MinimumRemainingValues:
+    """
+    The default branching strategy of CSPSolver. It branches on the unassigned variable with the minimum
+    remaining values (see CSPSolver.select_unassigned_variable), and tries all of its values.
+    """
+    def trailed_domains(self, csp, domains):
+        """
+        :returns: the TrailedDomains object searched by CSPSolver.
+        """
+        return TrailedDomains(domains)
+
+    def branches(self, assignments, domains):
+        """
+        :returns: a list of (variable, value) tuples of the unassigned variables. Any solution reachable from the
+        input assignments has exactly one of them.
+        """
+        var = CSPSolver.select_unassigned_variable(assignments, domains)
+        return [(var, val) for val in domains[var]]
+
+
+class MostConstrainedItem(MinimumRemainingValues):
+    """
+    A branching strategy for exact cover problems (see DLXSolver), where each item in the values
+    (see CSP.value_items) must be covered by the value of exactly one variable.
+    It branches on the uncovered item that the fewest available values of the unassigned variables cover,
+    and tries all of these values. For quadrillion, this is the empty dot that the fewest shape
+    configurations can cover. An uncovered item that no value covers ends the branch immediately.
+    """
+    def trailed_domains(self, csp, domains):
+        return ItemIndexedDomains(domains, csp.value_items)
+
+    def branches(self, assignments, domains):
+        covered_items = set()
+        for val in assignments.values():
+            covered_items.update(domains.value_items(val))
+        uncovered_items = [item for item in domains.nr_candidates if item not in covered_items]
+        if not uncovered_items:
+            return super().branches(assignments, domains)
+        item = min(uncovered_items, key=domains.nr_candidates.__getitem__)
+        return [(var, val) for var, val in domains.candidates(item) if var not in assignments and val in domains[var]]
+
+
+class RandomizedBranching:
+    """
+    A branching strategy that tries the branches of another branching strategy in a random order.
+    """
+    def __init__(self, branching=None, rand=None):
+        """
+        :param branching: the randomized branching strategy, MinimumRemainingValues by default.
+        :param rand: a random.Random object, so that the order can be reproduced from its seed.
+        """
+        self.branching = branching if branching else MinimumRemainingValues()
+        self.rand = rand if rand else random.Random()
+
+    def trailed_domains(self, csp, domains):
+        return self.branching.trailed_domains(csp, domains)
+
+    def branches(self, assignments, domains):
+        branches = list(self.branching.branches(assignments, domains))
+        self.rand.shuffle(branches)
+        return branches
+
+
+class TrailedDomains(dict):
+    """
+    A dictionary containing variables and their current possible values, where values are removed in place
+    and recorded on an undo trail. Removed values are restored by popping the trail on backtracking,
+    so no domains are copied during the search. The order of the values never changes.
+    """
+    def __init__(self, domains):
+        super().__init__((var, _TrailedDomain(values)) for var, values in domains.items())
+        self._trail = []
+
+    def remove(self, var, values):
+        """
+        removes the input values of the input variable if they are not already removed.
+        :returns: the list of removed values.
+        """
+        removed_values = self[var].remove(values)
+        if removed_values:
+            self._trail.append((var, removed_values))
+        return removed_values
+
+    def mark(self):
+        """
+        :returns: the current position of the trail, to be passed to undo.
+        """
+        return len(self._trail)
+
+    def undo(self, trail_mark):
+        """
+        restores all values removed after the input trail mark was taken
+        """
+        while len(self._trail) > trail_mark:
+            var, values = self._trail.pop()
+            self[var].restore(values)
+
+    def copy(self, variables):
+        """
+        :returns: a dictionary containing the input variables and their current values in
+        dictionaries (used as ordered sets).
+        """
+        return {var: dict.fromkeys(self[var]) for var in variables}
+
+    def assign(self, var, val):
+        """
+        called by CSPSolver for each new (or inferred) assignment. The domains of assigned variables
+        are not changed by default.
+        """
+        pass
+
+
+class ItemIndexedDomains(TrailedDomains):
+    """
+    TrailedDomains that also indexes the values covering each item (see CSP.value_items), and keeps
+    the number of available values covering each item in nr_candidates. The numbers are updated
+    when values are removed or restored. The domain of an assigned variable is reduced to its value,
+    so the values of assigned variables are not counted as candidates of the items they do not cover.
+    """
+    def __init__(self, domains, value_items):
+        super().__init__(domains)
+        self._csp_value_items = value_items
+        self._value_items = dict()
+        self._candidates = defaultdict(list)
+        for var, values in domains.items():
+            for val in values:
+                for item in self.value_items(val):
+                    self._candidates[item].append((var, val))
+        self.nr_candidates = {item: len(candidates) for item, candidates in self._candidates.items()}
+
+    def value_items(self, val):
+        """
+        :returns: a tuple of the items of the input value, which are computed once for each value.
+        """
+        if val not in self._value_items:
+            self._value_items[val] = tuple(self._csp_value_items(val))
+        return self._value_items[val]
+
+    def candidates(self, item):
+        """
+        :returns: a list of all (variable, value) tuples covering the input item, including removed values.
+        """
+        return self._candidates[item]
+
+    def remove(self, var, values):
+        removed_values = super().remove(var, values)
+        self._count_items(removed_values, -1)
+        return removed_values
+
+    def undo(self, trail_mark):
+        while len(self._trail) > trail_mark:
+            var, values = self._trail.pop()
+            self[var].restore(values)
+            self._count_items(values, 1)
+
+    def assign(self, var, val):
+        self.remove(var, [other_val for other_val in self[var] if other_val != val])
+
+    def _count_items(self, values, change):
+        for val in values:
+            for item in self._value_items[val]:
+                self.nr_candidates[item] += change
+
+
+class _TrailedDomain:
+    """
+    The values of one variable in TrailedDomains. Removed values are only marked as removed to keep the order.
+    """
+    __slots__ = ('_is_available', '_size')
+
+    def __init__(self, values):
+        self._is_available = dict.fromkeys(values, True)
+        self._size = len(self._is_available)
+
+    def __iter__(self):
+        return iter([val for val, is_available in self._is_available.items() if is_available])
+
+    def __contains__(self, val):
+        return self._is_available.get(val, False)
+
+    def __len__(self):
+        return self._size
+
+    def remove(self, values):
+        """
+        :returns: the list of the input values that were available and are removed.
+        """
+        removed_values = [val for val in values if self._is_available.get(val, False)]
+        for val in removed_values:
+            self._is_available[val] = False
+        self._size -= len(removed_values)
+        return removed_values
+
+    def restore(self, values):
+        for val in values:
+            self._is_available[val] = True
+        self._size += len(values)
+
+
+class DLXSolver(Solver):
+    """
+    An implementation of Knuth's Algorithm X for exact cover problems. Instead of dancing links,
+    the columns of the exact cover matrix are kept in a dictionary of sets of rows, which is the
+    fastest way of removing and restoring them in python.
+    The CSP is seen as an exact cover problem whose rows are all (variable, value) pairs in
+    the domains and whose columns are all variables and all items in the values (see CSP.value_items).
+    The inference in CSP.register_current_assignments and CSP.is_consistent_assignment are not used.
+    """
+    def __init__(self, budget=None):
+        """
+        :param budget: an optional Budget of each search (see CSPSolver).
+        """
+        self.budget = budget
+        self.nr_nodes = 0
+
+    def _search(self, csp):
+        self.csp = csp
+        self.stats = csp.stats
+        self.nr_nodes = 0
+        if self.budget is not None:
+            self.budget.start()
+        self._build_matrix(csp.variables, csp.domains)
+        yield from self._algorithm_x([])
+
+    def _get_solution(self, partial_solution):
+        return dict(self._assignments[row] for row in partial_solution)
+
+    def _build_matrix(self, variables, domains):
+        """
+        builds the columns (each is a set of rows) and the rows (each is a list of columns).
+        Rows and columns are numbered to make hashing them fast, self._assignments maps
+        the number of each row to its (variable, value) pair.
+        """
+        column_numbers = {('variable', var): number for number, var in enumerate(variables)}
+        self._columns = {number: set() for number in column_numbers.values()}
+        self._rows = []
+        self._assignments = []
+        for var in variables:
+            for val in domains.get(var, ()):
+                row = len(self._rows)
+                self._assignments.append((var, val))
+                self._rows.append([column_numbers[('variable', var)]])
+                for item in self.csp.value_items(val):
+                    # the numbers of the columns of the items are added when they are first seen
+                    self._rows[row].append(column_numbers.setdefault(('item', item), len(column_numbers)))
+                for column in self._rows[row]:
+                    self._columns.setdefault(column, set()).add(row)
+
+    def _algorithm_x(self, partial_solution):
+        """
+        The recursive search generator. It yields the input list of rows each time
+        it is completed to a solution, and restores it before continuing the search.
+        """
+        if not self._columns:
+            yield partial_solution
+            return
+        column = min(self._columns, key=lambda col: len(self._columns[col]))
+        for row in list(self._columns[column]):
+            self.nr_nodes += 1
+            if self.stats is not None:
+                self.stats.count('nodes')
+            if self.budget is not None:
+                self.budget.check(self.nr_nodes)
+            partial_solution.append(row)
+            removed_columns = self._select(row)
+            yield from self._algorithm_x(partial_solution)
+            self._deselect(row, removed_columns)
+            partial_solution.pop()
+
+    def _select(self, row):
+        """
+        removes the columns covered by the input row and all rows sharing any of these columns.
+        :returns: the removed columns that should be passed to _deselect to restore them.
+        """
+        removed_columns = []
+        for column in self._rows[row]:
+            for other_row in self._columns[column]:
+                for other_column in self._rows[other_row]:
+                    if other_column != column:
+                        self._columns[other_column].remove(other_row)
+            removed_columns.append(self._columns.pop(column))
+        return removed_columns
+
+    def _deselect(self, row, removed_columns):
+        for column in reversed(self._rows[row]):
+            self._columns[column] = removed_columns.pop()
+            for other_row in self._columns[column]:
+                for other_column in self._rows[other_row]:
+                    if other_column != column:
+                        self._columns[other_column].add(other_row)
+
+
+class RestartSolver(Solver):
+    """
+    Looks for the first solution by the deterministic search of CSPSolver for a slice of search nodes, then by
+    searches with randomized value ordering (see RandomizedBranching) that are restarted after a number of nodes
+    given by a Luby (1, 1, 2, 1, 1, 2, 4, ...) or a geometric schedule. Since some searches end up in a bad early
+    branch, restarting cuts the heavy tail of the solving times. The node limits grow without bound, so the search
+    is still complete. The whole search is reproducible from the seed.
+    Iterating over and counting the solutions are done by the deterministic search only.
+    """
+    def __init__(self, branching=None, seed=0, schedule='luby', restart_nodes=100, deterministic_nodes=1000,
+                 budget=None):
+        """
+        :param branching: the branching strategy of the CSPSolvers (see CSPSolver).
+        :param seed: the seed of the random value ordering.
+        :param schedule: 'luby' or 'geometric', the schedule of the node limits of the randomized searches.
+        :param restart_nodes: the unit of the Luby schedule or the first node limit of the geometric schedule.
+        :param deterministic_nodes: the node limit of the deterministic search tried first.
+        :param budget: an optional Budget of the whole search, its max_nodes bounds the nodes of all searches.
+        """
+        if schedule not in ('luby', 'geometric'):
+            raise ValueError('unknown restart schedule: {}'.format(schedule))
+        self.branching = branching
+        self.seed = seed
+        self.schedule = schedule
+        self.restart_nodes = restart_nodes
+        self.deterministic_nodes = deterministic_nodes
+        self.budget = budget
+        self.nr_nodes = 0
+        self.nr_restarts = 0
+
+    def __call__(self, csp):
+        if self.budget is not None:
+            self.budget.start()
+        self.nr_nodes = 0
+        self.nr_restarts = 0
+        rand = random.Random(self.seed)
+        for run, node_limit in enumerate(self._node_limits()):
+            branching = self.branching if run == 0 else RandomizedBranching(self.branching, rand)
+            solver = CSPSolver(branching, self._run_budget(node_limit))
+            solution = solver(csp)
+            self.nr_nodes += solver.nr_nodes
+            if solution is not UNKNOWN:
+                return solution
+            if self._is_budget_exhausted():
+                return UNKNOWN
+            self.nr_restarts += 1
+            if csp.stats is not None:
+                csp.stats.count('restarts')
+
+    def _node_limits(self):
+        """
+        A generator of the node limits of the deterministic search followed by the randomized searches.
+        """
+        yield self.deterministic_nodes
+        for run in itertools.count(1):
+            if self.schedule == 'luby':
+                yield self.restart_nodes * luby(run)
+            else:
+                yield int(self.restart_nodes * 1.5 ** (run - 1))
+
+    def _run_budget(self, node_limit):
+        """
+        :returns: the budget of one search with the input node limit within the budget of the whole search.
+        """
+        if self.budget is None:
+            return Budget(max_nodes=node_limit)
+        if self.budget.max_nodes is not None:
+            node_limit = min(node_limit, self.budget.max_nodes - self.nr_nodes)
+        timeout = self.budget.deadline - time.time() if self.budget.deadline is not None else None
+        return Budget(timeout, node_limit, self.budget.cancellation_token)
+
+    def _is_budget_exhausted(self):
+        try:
+            if self.budget is not None:
+                self.budget.check(self.nr_nodes)
+            return False
+        except BudgetExhausted:
+            return True
+
+    def _search(self, csp):
+        self._solver = CSPSolver(self.branching, self.budget)
+        return self._solver._search(csp)
+
+    def _get_solution(self, assignments):
+        return self._solver._get_solution(assignments)
+
+
+def luby(i):
+    """
+    :returns: the i-th (starting from 1) number of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if i == (1 << k) - 1:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+class ParallelSolver(Solver):
+    """
+    Splits the search space of a CSP into subproblems (see CSPSolver.subproblems) and solves them
+    by CSPSolvers in a pool of processes. The CSP is sent once to each process in the form returned by
+    CSP.picklable, and the subproblems are sent in the same form.
+    When looking for the first solution, or when the limit of counted solutions is reached, the search of all
+    the processes is stopped. Otherwise, the solutions (or their numbers) of all subproblems are collected.
+    The statistics of the CSP (if collected) do not include the searches of the subproblems.
+    """
+    def __init__(self, max_workers=None, split_depth=2, branching=None, budget=None):
+        """
+        :param max_workers: the number of processes, by default the number of processors on the machine.
+        :param split_depth: the number of branching steps taken to get the subproblems.
+        :param branching: the branching strategy of the CSPSolvers (see CSPSolver).
+        :param budget: an optional Budget shared by the CSPSolvers. Its timeout and cancellation token
+        bound the whole search, while its max_nodes bounds the search of each subproblem.
+        """
+        self.max_workers = max_workers
+        self.split_depth = split_depth
+        self.branching = branching
+        self.budget = budget
+
+    def __call__(self, csp):
+        try:
+            with closing(self._search(csp, 'first')) as solutions:
+                for solution in solutions:
+                    return self._get_solution(solution)
+        except BudgetExhausted:
+            return UNKNOWN
+        return None
+
+    def count_solutions(self, csp, limit=None):
+        nr_solutions = 0
+        try:
+            with closing(self._search(csp, 'count', limit)) as subproblems_nr_solutions:
+                for nr_subproblem_solutions in subproblems_nr_solutions:
+                    nr_solutions += nr_subproblem_solutions
+                    if limit is not None and nr_solutions >= limit:
+                        return limit
+        except BudgetExhausted:
+            return UNKNOWN
+        return nr_solutions
+
+    def _search(self, csp, mode='all', limit=None):
+        """
+        A generator that yields the results of the subproblems as soon as they are solved.
+        The results are solutions of the picklable csp if mode is 'first' or 'all',
+        and numbers of solutions if mode is 'count'.
+        """
+        self.csp = csp
+        picklable_csp = csp.picklable()
+        if self.budget is not None:
+            self.budget.start()
+        # the processes are stopped by cancelling the token of their budget when the results are no longer needed.
+        # The budget is sent with the csp since its cancellation token can only be shared when a process starts.
+        stop_token = CancellationToken(self.budget.cancellation_token if self.budget is not None else None)
+        executor = ProcessPoolExecutor(self.max_workers, initializer=_set_worker_csp,
+                                       initargs=(picklable_csp, self._worker_budget(stop_token)))
+        try:
+            futures = [executor.submit(_solve_subproblem, assignments, domains, mode, limit, self.branching)
+                       for assignments, domains in CSPSolver(self.branching).subproblems(picklable_csp,
+                                                                                         self.split_depth)]
+            for future in as_completed(futures):
+                result = future.result()
+                if mode == 'all':
+                    yield from result
+                elif result is not None:
+                    yield result
+        finally:
+            stop_token.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _worker_budget(self, stop_token):
+        """
+        :returns: a copy of the (started) budget of the solver, or an unbounded budget if it has none,
+        with the input cancellation token.
+        """
+        if self.budget is None:
+            return Budget(cancellation_token=stop_token)
+        budget = Budget(self.budget.timeout, self.budget.max_nodes, stop_token)
+        budget.deadline = self.budget.deadline
+        return budget
+
+    def _get_solution(self, solution):
+        return self.csp.from_picklable_solution(solution)
+
+
+_worker_csp = None  # the csp solved by a ParallelSolver process
+_worker_budget = None  # the budget of the ParallelSolver
+
+
+def _set_worker_csp(csp, budget=None):
+    global _worker_csp, _worker_budget
+    _worker_csp = csp
+    _worker_budget = budget
+
+
+def _solve_subproblem(assignments, domains, mode, limit, branching=None):
+    """
+    The task run by the processes of ParallelSolver.
+    :returns: the first solution or None if mode is 'first', a list of all solutions if mode is 'all'
+    and the number of solutions (up to limit) if mode is 'count'.
+    :raises BudgetExhausted: if the budget of the ParallelSolver is exhausted.
+    """
+    solutions = CSPSolver(branching, _worker_budget).subproblem_solutions(_worker_csp, assignments, domains)
+    if mode == 'first':
+        for solution in solutions:
+            return dict(solution)
+        return None
+    elif mode == 'all':
+        return [dict(solution) for solution in solutions]
+    nr_solutions = 0
+    for _ in solutions:
+        nr_solutions += 1
+        if nr_solutions == limit:
+            break
+    return nr_solutions
\ No newline at end of file
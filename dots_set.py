@@ -1,22 +1,46 @@
 import pickle
+from functools import lru_cache
 from collections import namedtuple
 from collections.abc import Set
-from quadrillion_data import GRIDS, SHAPES, SAVE_PATH
+from quadrillion_data import GRIDS, SHAPES, SAVE_PATH, DOT_SPACE_DIM
 Config = namedtuple('Config', ['flips', 'rotations', 'location'])
 
+# the 8 symmetries of the square (rotations and reflections) as matrices ((a, b), (c, d)) that
+# transform the dot (y, x) into (a*y + b*x, c*y + d*x). The first transform is the identity.
+DIHEDRAL_TRANSFORMS = (((1, 0), (0, 1)), ((0, 1), (-1, 0)), ((-1, 0), (0, -1)), ((0, -1), (1, 0)),
+                       ((-1, 0), (0, 1)), ((0, 1), (1, 0)), ((1, 0), (0, -1)), ((0, -1), (-1, 0)))
+
 
 class DotsSet(Set):
-    def __init__(self, dots, initial_config=Config(flips=0, rotations=0, location=(0, 0)), color='#FFFFFF'):
+    # the orientations (the 8 combinations of flips and rotations at the location (0, 0)) of each initial dots
+    # and their configs (see _get_configs_by_orientation), computed once and shared by all the dots sets with the
+    # same initial dots.
+    _orientations_table = dict()
+    _configs_by_orientation_table = dict()
+    _unique_configs_table = dict()
+
+    # instances keep only references to the shared tables and cached frozensets, and the bitmask of their dots
+    __slots__ = ('_dots_set', '_mask', '_initial_dots_set', '_height', '_width', '_color', '_name', '_hash',
+                 '_orientations', '_configs_by_orientation', '_unique_configs', '_config', '_initial_config',
+                 '_move_callback')
+
+    def __init__(self, dots, initial_config=Config(flips=0, rotations=0, location=(0, 0)), color='#FFFFFF', name=''):
         if not self._are_valid_dots(dots):
             raise TypeError("dots must be of the form (int y, int x) where y >= 0 and x >= 0")
         self._dots_set = self._initial_dots_set = frozenset(dots)
         self._height = max(pos[0] for pos in self._dots_set) + 1
         self._width = max(pos[1] for pos in self._dots_set) + 1
         self._color = color
+        self._name = name
         self._hash = hash(self._initial_dots_set)
+        self._orientations = self._get_orientations(self._initial_dots_set)
+        self._initial_dots_set = self._orientations[0]
+        self._configs_by_orientation = self._get_configs_by_orientation(self._initial_dots_set)
+        self._unique_configs = self._get_unique_configs(self._initial_dots_set)
 
         self._config = Config(flips=0, rotations=0, location=(0, 0))
         self._initial_config = initial_config
+        self._move_callback = None
         self.reset()
 
     @classmethod
@@ -30,6 +54,28 @@ class DotsSet(Set):
     def __contains__(self, value):
         return value in self._dots_set
 
+    def __and__(self, other):
+        if self._are_masks_of(other):
+            return mask_to_dots(self._mask & other._mask)
+        return Set.__and__(self, other)
+
+    def __le__(self, other):
+        if self._are_masks_of(other):
+            return not self._mask & ~other._mask
+        return Set.__le__(self, other)
+
+    def isdisjoint(self, other):
+        if self._are_masks_of(other):
+            return not self._mask & other._mask
+        return Set.isdisjoint(self, other)
+
+    def _are_masks_of(self, other):
+        """
+        :returns: whether both self and other are DotsSets inside the dot space, so they have bitmasks of
+        their dots (see dots_to_mask) that can be used for fast set operations between them.
+        """
+        return isinstance(other, DotsSet) and self._mask is not None and other._mask is not None
+
     def __len__(self):
         return len(self._dots_set)
 
@@ -49,6 +95,10 @@ class DotsSet(Set):
     def color(self):
         return self._color
 
+    @property
+    def name(self):
+        return self._name
+
     def reset(self):
         self.config = self._initial_config
 
@@ -69,28 +119,20 @@ class DotsSet(Set):
         returns the configs that are unique for dots at a certain location
         these are equal or less than all possible configs
         """
-        if not hasattr(self, 'unique_configs'):
-            dots_sets = []
-            self.unique_configs = set()
-            for flip in range(2):
-                for rotation in range(4):
-                    config = Config(flip, rotation, (0, 0))
-                    dots_set = self.configured(config)
-                    if not dots_set in dots_sets:
-                        dots_sets.append(dots_set)
-                        self.unique_configs.add(config)
-        return {config._replace(location=location) for config in self.unique_configs}
+        return {config._replace(location=location) for config in self._unique_configs}
 
     def set_dots(self, dots):
         """
-        converts dots into a config and then sets the dots_set to this config
+        converts dots into a config and then sets the dots_set to this config.
+        The dots are normalized to the origin and their config is looked up in the configs_by_orientation index.
         """
-        location = min(y for y, x in dots), min(x for y, x in dots)
-        for config in self.get_unique_configs_at(location):
-            if self.configured(config) == dots:
-                self.config = config
-                return
-        raise ValueError('the input dots do not correspond to this dots_set')
+        try:
+            normalized, (dy, dx) = normalized_dots(dots)
+            flips, rotations, (offset_y, offset_x) = self._configs_by_orientation[frozenset(normalized)]
+        except (KeyError, ValueError):
+            raise ValueError('the input dots {} do not correspond to any config of the dots_set {}'.format(
+                sorted(dots), self)) from None
+        self.config = Config(flips, rotations, (dy - offset_y, dx - offset_x))
 
     @property
     def config(self):
@@ -104,12 +146,67 @@ class DotsSet(Set):
         """
         self._config = config._replace(flips=config.flips % 2, rotations=config.rotations % 4)
         self._dots_set = frozenset(self.configured(self.config))
+        self._mask = dots_mask(self._dots_set)
+        if self._move_callback is not None:
+            self._move_callback(self)
+
+    def set_move_callback(self, callback):
+        """
+        :param callback: a function that is called with the dots_set after each time it is moved
+        (by setting its config), or None to not call any.
+        """
+        self._move_callback = callback
 
     def configured(self, config):
-        flipped_dots = self._initial_dots_flipped(config.flips)
-        rotated_dots = self._rotated_clockwise(flipped_dots, config.rotations)
-        moved_dots = self._moved(rotated_dots, config.location)
-        return moved_dots
+        """
+        :returns: a frozenset of the dots at the input config, which is only a translation of one of the
+        precomputed orientations (cached by location, see translated_dots).
+        """
+        return translated_dots(self._orientations[config.flips % 2 * 4 + config.rotations % 4], config.location)
+
+    def _get_orientations(self, key):
+        """
+        :returns: the tuple of the orientations of the initial dots indexed by flips * 4 + rotations,
+        which are taken from the orientations table if they were computed before for the same key.
+        """
+        if key not in self._orientations_table:
+            self._orientations_table[key] = tuple(
+                frozenset(self._rotated_clockwise(self._initial_dots_flipped(flips), rotations))
+                for flips in range(2) for rotations in range(4))
+        return self._orientations_table[key]
+
+    def _get_configs_by_orientation(self, key):
+        """
+        :returns: a dict that maps the configured dots of each orientation normalized to the origin
+        (see normalized_dots) to the first config that has them, but with the offset that was subtracted from
+        the dots in place of the location. It is taken from its table if it was computed before for the same key.
+        """
+        if key not in self._configs_by_orientation_table:
+            configs_by_orientation = dict()
+            for flips in range(2):
+                for rotations in range(4):
+                    normalized, offset = normalized_dots(self.configured(Config(flips, rotations, (0, 0))))
+                    configs_by_orientation.setdefault(frozenset(normalized), Config(flips, rotations, offset))
+            self._configs_by_orientation_table[key] = configs_by_orientation
+        return self._configs_by_orientation_table[key]
+
+    def _get_unique_configs(self, key):
+        """
+        :returns: the set of the configs at the location (0, 0) that have different dots, which is taken from its
+        table if it was computed before for the same key.
+        """
+        if key not in self._unique_configs_table:
+            dots_sets = []
+            unique_configs = set()
+            for flip in range(2):
+                for rotation in range(4):
+                    config = Config(flip, rotation, (0, 0))
+                    dots_set = self.configured(config)
+                    if not dots_set in dots_sets:
+                        dots_sets.append(dots_set)
+                        unique_configs.add(config)
+            self._unique_configs_table[key] = unique_configs
+        return self._unique_configs_table[key]
 
     def _are_valid_dots(self, dots):
         return all(len(dot) == 2 and isinstance(dot, tuple)
@@ -132,10 +229,6 @@ class DotsSet(Set):
         elif times % 4 == 3:
             return self._rotated_90_degrees_counterclockwise(dots)
 
-    def _moved(self, dots, displacement):
-        dy, dx = displacement
-        return {(y + dy, x + dx) for y, x in dots}
-
     def _flipped_vertically(self, dots):
         return {(self._height - 1 - y, x) for y, x in dots}
 
@@ -157,21 +250,31 @@ class DotsGrid(DotsSet):
     _white_side_color = '#FFFFFF'
     _black_side_color = '#373535'
 
+    __slots__ = ('_initial_closed_black_dots', '_initial_closed_white_dots', '_all_dots', '_open_dots', '_closed_dots')
+
     def __init__(self, closed_black_dots, closed_white_dots, height=4, width=4,
-                 initial_config=Config(flips=0, rotations=0, location=(0, 0))):
+                 initial_config=Config(flips=0, rotations=0, location=(0, 0)), name=''):
         if not self._are_valid_dots(set(closed_black_dots) | set(closed_white_dots), height, width):
             raise TypeError("dots must be of the form (int y, int x) " 
                             "where 0 <= y < height and 0 <= x < width")
 
         self._height = height
         self._width = width
+        self._name = name
 
         self._initial_closed_black_dots = frozenset(closed_black_dots)
         self._initial_closed_white_dots = frozenset(closed_white_dots)
+        self._all_dots = rectangle_dots(height, width)
+        orientations_key = self._initial_closed_black_dots, self._initial_closed_white_dots, height, width
+        self._orientations = self._get_orientations(orientations_key)
+        self._initial_closed_black_dots, self._initial_closed_white_dots = self._orientations[0], self._orientations[4]
+        self._configs_by_orientation = self._get_configs_by_orientation(orientations_key)
+        self._unique_configs = self._get_unique_configs(orientations_key)
 
         self._hash = hash(self._initial_closed_white_dots & self._initial_closed_black_dots)
         self._config = Config(flips=0, rotations=0, location=(0, 0))
         self._initial_config = initial_config
+        self._move_callback = None
         self.reset()
 
     def __hash__(self):
@@ -194,11 +297,20 @@ class DotsGrid(DotsSet):
 
     @property
     def open_dots(self):
-        return self._get_open_dots_at(self.config)
+        return self._open_dots
 
     @property
     def closed_dots(self):
-        return self._get_closed_dots_at(self.config)
+        return self._closed_dots
+
+    @DotsSet.config.setter
+    def config(self, config):
+        """
+        the open and closed dots are cached with each new config, as they are read much more than the config changes
+        """
+        self._closed_dots = self._get_closed_dots_at(config)
+        self._open_dots = self._get_open_dots_at(config)
+        DotsSet.config.fset(self, config)
 
     def _are_valid_dots(self, dots, height, width):
         return super()._are_valid_dots(dots) and all(y < height and x < width for y, x in dots)
@@ -210,8 +322,7 @@ class DotsGrid(DotsSet):
         return self._get_all_dots_at(config) - self._get_closed_dots_at(config)
 
     def _get_all_dots_at(self, config):
-        y0, x0 = config.location
-        return {(y, x) for y in range(y0, y0 + self._height) for x in range(x0, x0 + self._width)}
+        return translated_dots(self._all_dots, config.location)
 
     def _get_closed_dots_at(self, config):
         return super().configured(config)
@@ -256,36 +367,207 @@ class DotsSetFactory:
         self._shapes = dict()
         for shape_name, (dots, config, color) in SHAPES.items():
             config = self._get_item_config(shape_name, config, saved_configs)
-            self._shapes[shape_name] = DotsSet(dots, Config(*config), color)
+            self._shapes[shape_name] = DotsSet(dots, Config(*config), color, shape_name)
 
     def _create_grids(self, saved_configs):
         self._grids = dict()
         for grid_name, ((invalid_black, invalid_wight), config) in GRIDS.items():
             config = self._get_item_config(grid_name, config, saved_configs)
-            self._grids[grid_name] = DotsGrid(invalid_black, invalid_wight, initial_config=Config(*config))
+            self._grids[grid_name] = DotsGrid(invalid_black, invalid_wight, initial_config=Config(*config),
+                                              name=grid_name)
 
     def _get_item_config(self, item_name, default_config, saved_configs):
         return default_config if item_name not in saved_configs else saved_configs[item_name]
 
 
+@lru_cache(maxsize=2**14)
+def translated_dots(dots, displacement):
+    """
+    :param dots: a frozenset of dots.
+    :returns: a frozenset of the input dots translated by the input displacement (dy, dx).
+    The results are cached, so translating the same dots to the same location again is a lookup.
+    """
+    dy, dx = displacement
+    return frozenset((y + dy, x + dx) for y, x in dots)
+
+
+@lru_cache()
+def rectangle_dots(height, width):
+    """
+    :returns: a frozenset of all the dots of a rectangle of the input size at the location (0, 0).
+    """
+    return frozenset((y, x) for y in range(height) for x in range(width))
+
+
+@lru_cache(maxsize=2**14)
+def dots_mask(dots, dot_space_dim=DOT_SPACE_DIM):
+    """
+    :param dots: a frozenset of dots.
+    :returns: the bitmask of the input dots (see dots_to_mask), or None if any of them is outside the dot space.
+    The results are cached like in translated_dots.
+    """
+    height, width = dot_space_dim
+    if all(0 <= y < height and 0 <= x < width for y, x in dots):
+        return dots_to_mask(dots, width)
+    return None
+
+
 def connected_dots_sets(dots_set):
     """
     a utility generator that yields sets of connected dots in a dots_set.
     Dots can be connected horizontally and vertically but not diagonally.
+    Each dot is visited once, so the time is linear in the number of dots.
     """
-    def connected_dots_set_at(dot):
+    remaining_dots = set(dots_set)
+    while remaining_dots:
+        dot = remaining_dots.pop()
         connected_dots = {dot}
-        dots_queue =[dot]
-        while dots_queue:
-            y, x = dots_queue.pop()
-            successors = dots_set & ({(y+1, x), (y-1, x), (y, x+1), (y, x-1)} - connected_dots)
-            for dot in successors:
-                connected_dots.add(dot)
-                dots_queue.insert(0, dot)
-        return connected_dots
-    seen_dots = set()
-    for dot in dots_set:
-        if dot in seen_dots: continue
-        connected_dots = connected_dots_set_at(dot)
+        dots_stack = [dot]
+        while dots_stack:
+            y, x = dots_stack.pop()
+            for neighbor in (y+1, x), (y-1, x), (y, x+1), (y, x-1):
+                if neighbor in remaining_dots:
+                    remaining_dots.remove(neighbor)
+                    connected_dots.add(neighbor)
+                    dots_stack.append(neighbor)
         yield connected_dots
-        seen_dots |= connected_dots
+
+
+def connected_dots_sizes(dots_set):
+    """
+    the same as connected_dots_sets but yields only the number of dots in each set of connected dots,
+    which saves building the sets.
+    """
+    remaining_dots = set(dots_set)
+    while remaining_dots:
+        dots_stack = [remaining_dots.pop()]
+        size = 1
+        while dots_stack:
+            y, x = dots_stack.pop()
+            for neighbor in (y+1, x), (y-1, x), (y, x+1), (y, x-1):
+                if neighbor in remaining_dots:
+                    remaining_dots.remove(neighbor)
+                    dots_stack.append(neighbor)
+                    size += 1
+        yield size
+
+
+def dots_to_mask(dots, width=DOT_SPACE_DIM[1]):
+    """
+    encodes dots as an int bitmask where the dot (y, x) is the bit number y * width + x.
+    All dots must be inside a dot space of the input width.
+    """
+    mask = 0
+    for y, x in dots:
+        mask |= 1 << (y * width + x)
+    return mask
+
+
+def mask_to_dots(mask, width=DOT_SPACE_DIM[1]):
+    """
+    the inverse of dots_to_mask: decodes an int bitmask into a set of dots.
+    """
+    dots = set()
+    while mask:
+        lowest_bit = mask & -mask
+        dots.add(divmod(lowest_bit.bit_length() - 1, width))
+        mask ^= lowest_bit
+    return dots
+
+
+def connected_masks(mask, dot_space_dim=DOT_SPACE_DIM):
+    """
+    the same as connected_dots_sets but for dots encoded as an int bitmask (see dots_to_mask).
+    Each connected component is grown from one of its dots by shifting it in the four directions.
+    """
+    height, width = dot_space_dim
+    not_first_column, not_last_column = _not_first_and_last_columns_masks(height, width)
+    while mask:
+        connected_mask = mask & -mask
+        while True:
+            grown_mask = mask & (connected_mask
+                                 | (connected_mask << 1) & not_first_column
+                                 | (connected_mask >> 1) & not_last_column
+                                 | connected_mask << width
+                                 | connected_mask >> width)
+            if grown_mask == connected_mask:
+                break
+            connected_mask = grown_mask
+        yield connected_mask
+        mask ^= connected_mask
+
+
+@lru_cache()
+def _not_first_and_last_columns_masks(height, width):
+    all_dots = {(y, x) for y in range(height) for x in range(width)}
+    return (dots_to_mask({(y, x) for y, x in all_dots if x != 0}, width),
+            dots_to_mask({(y, x) for y, x in all_dots if x != width - 1}, width))
+
+
+def transformed_dots(dots, transform):
+    """
+    :param transform: one of the DIHEDRAL_TRANSFORMS
+    :returns: the set of the input dots transformed (around the origin) by the input transform.
+    """
+    (a, b), (c, d) = transform
+    return {(a*y + b*x, c*y + d*x) for y, x in dots}
+
+
+def inverse_transform(transform):
+    """
+    :returns: the one of the DIHEDRAL_TRANSFORMS that undoes the input transform (the transposed matrix).
+    """
+    (a, b), (c, d) = transform
+    return (a, c), (b, d)
+
+
+def normalized_dots(dots):
+    """
+    :returns: the input dots translated such that their minimum y and minimum x are zeros,
+    and the translation (dy, dx) that was subtracted from them.
+    """
+    dy, dx = min(y for y, x in dots), min(x for y, x in dots)
+    return {(y - dy, x - dx) for y, x in dots}, (dy, dx)
+
+
+def canonical_dots(dots):
+    """
+    Dots that are equal up to translation and the DIHEDRAL_TRANSFORMS have the same canonical form.
+    :returns: a tuple (canonical, transform, translation), where canonical is the sorted tuple of the input
+    dots transformed by transform then translated by -translation.
+    """
+    candidates = []
+    for transform in DIHEDRAL_TRANSFORMS:
+        normalized, translation = normalized_dots(transformed_dots(dots, transform))
+        candidates.append((tuple(sorted(normalized)), transform, translation))
+    return min(candidates)
+
+
+def from_canonical_dots(dots, transform, translation):
+    """
+    the inverse of canonical_dots: maps dots in the canonical frame back to the original frame.
+    """
+    dy, dx = translation
+    return transformed_dots({(y + dy, x + dx) for y, x in dots}, inverse_transform(transform))
+
+
+def dots_symmetries(dots):
+    """
+    :returns: a list of the symmetries that map the input dots onto themselves as (transform, translation)
+    tuples, where transform is one of the DIHEDRAL_TRANSFORMS. The first symmetry is the identity.
+    """
+    normalized, (dy, dx) = normalized_dots(dots)
+    symmetries = []
+    for transform in DIHEDRAL_TRANSFORMS:
+        transformed_normalized, (transformed_dy, transformed_dx) = normalized_dots(transformed_dots(dots, transform))
+        if transformed_normalized == normalized:
+            symmetries.append((transform, (dy - transformed_dy, dx - transformed_dx)))
+    return symmetries
+
+
+def symmetric_dots(dots, symmetry):
+    """
+    :returns: the input dots transformed then translated by the input symmetry (see dots_symmetries).
+    """
+    transform, (dy, dx) = symmetry
+    return {(y + dy, x + dx) for y, x in transformed_dots(dots, transform)}
@@ -1,7 +1,9 @@
 import traceback
+import threading
 import tkinter as tk
 from quadrillion_exception import *
 CELL_Len = 32
+SEARCH_POLL_INTERVAL = 100  # milliseconds
 DOT_COLOR = '#999999'
 BG_COLOR = '#BBBBBB'
 
@@ -105,22 +107,32 @@ class QuadrillionGraphicDisplay:
 
 
 class QuadrillionSolverGraphicDisplay(QuadrillionGraphicDisplay):
-    def __init__(self, quadrillion_csp_adapter):
+    def __init__(self, quadrillion_csp_adapter, cancellation_token=None):
+        """
+        :param quadrillion_csp_adapter: searches for solutions in a background thread. If it collects stats,
+        the number of search nodes is shown while searching.
+        :param cancellation_token: the CancellationToken in the budget of the solver of the adapter.
+        If given, the search can be stopped by the cancel button.
+        """
         self._quadrillion_solver = quadrillion_csp_adapter
+        self._cancellation_token = cancellation_token
+        self._search = None
         super().__init__(self._quadrillion_solver.quadrillion)
         self.master.report_callback_exception = self.report_callback_exception
 
         control_bar = tk.Frame(self.master, height=40)
         self.solve_button = tk.Button(control_bar, text='Find Solution!', relief='groove',
-                                      command=self._quadrillion_solver.solve)
+                                      command=self._solve)
         self.help_button  = tk.Button(control_bar, text='Help me!', relief='groove',
-                                      command=self._quadrillion_solver.help)
+                                      command=self._help)
         self.reset_button = tk.Button(control_bar, text='Reset', relief='groove',
                                       command=self._quadrillion.reset)
         self.save_button = tk.Button(control_bar, text='Save', relief='groove',
                                       command=self._quadrillion.save_game)
         self.load_button = tk.Button(control_bar, text='Load', relief='groove',
                                       command=self._quadrillion.load_game)
+        self.cancel_button = tk.Button(control_bar, text='Cancel', relief='groove', state='disabled',
+                                       command=self._cancel)
         self.text_area = tk.Label(control_bar, anchor='w', text='')
 
         for item in self.master.grid_slaves():
@@ -134,6 +146,7 @@ class QuadrillionSolverGraphicDisplay(QuadrillionGraphicDisplay):
         self.save_button.grid(row=0, column=2, sticky="nsew", padx=2, pady=2)
         self.load_button.grid(row=1, column=2, sticky="nsew", padx=2, pady=2)
         self.reset_button.grid(row=0, column=3, rowspan=2, sticky="nsew", padx=2, pady=2)
+        self.cancel_button.grid(row=0, column=4, rowspan=2, sticky="nsew", padx=2, pady=2)
         self.text_area.grid(row=0, column=1, rowspan=2, sticky="ew", padx=2, pady=2)
         control_bar.columnconfigure(1, weight=1)
 
@@ -147,16 +160,87 @@ class QuadrillionSolverGraphicDisplay(QuadrillionGraphicDisplay):
         else:
             traceback.print_exception(exc_type, exc_value, exc_traceback)
 
+    def _on_cell_clicked(self, event):
+        if not self._search:  # the game cannot be changed while searching
+            super()._on_cell_clicked(event)
+
     def _on_key_press(self, event):
         key = event.keysym
-        if   key == 'f' or key == 'F': self._quadrillion_solver.solve()
-        elif key == 'h' or key == 'H': self._quadrillion_solver.help()
+        if self._search: return
+        if   key == 'f' or key == 'F': self._solve()
+        elif key == 'h' or key == 'H': self._help()
         else: super()._on_key_press(event)
 
+    def _solve(self):
+        self._start_search(nr_shapes=None)
+
+    def _help(self):
+        self._start_search(nr_shapes=1)
+
+    def _start_search(self, nr_shapes):
+        """
+        searches for a solution in a background thread, which is polled by _poll_search, so the GUI stays
+        responsive. The found solution is applied to nr_shapes shapes (all shapes if None).
+        """
+        if self._cancellation_token is not None:
+            self._cancellation_token.reset()
+        self._search = SearchThread(self._quadrillion_solver.find_solution)
+        self._search.start()
+        self._set_buttons_state('disabled')
+        self.master.after(SEARCH_POLL_INTERVAL, self._poll_search, nr_shapes)
+
+    def _poll_search(self, nr_shapes):
+        """
+        shows the number of search nodes while the search is running, otherwise applies its result
+        (in the main thread).
+        """
+        if self._search.is_alive():
+            stats = self._quadrillion_solver.stats
+            self._show_text('Searching... {} nodes'.format(stats.counters['nodes']) if stats else 'Searching...')
+            self.master.after(SEARCH_POLL_INTERVAL, self._poll_search, nr_shapes)
+            return
+        search, self._search = self._search, None
+        self._set_buttons_state('normal')
+        self._show_text('')
+        if search.exception is not None:
+            raise search.exception
+        self._quadrillion_solver.apply_solution(search.solution, nr_shapes)
+
+    def _cancel(self):
+        if self._search and self._cancellation_token is not None:
+            self._cancellation_token.cancel()
+
+    def _set_buttons_state(self, state):
+        """
+        disables (or enables) the buttons that change the game while searching, and does the opposite
+        to the cancel button (if a search can be cancelled).
+        """
+        for button in self.solve_button, self.help_button, self.reset_button, self.save_button, self.load_button:
+            button.config(state=state)
+        if self._cancellation_token is not None:
+            self.cancel_button.config(state='normal' if state == 'disabled' else 'disabled')
+
     def _show_text(self, text=''):
         self.text_area.config(text=text)
 
 
+class SearchThread(threading.Thread):
+    """
+    A daemon thread that runs a search and keeps its solution or the exception raised by it.
+    """
+    def __init__(self, search):
+        super().__init__(daemon=True)
+        self._search_function = search
+        self.solution = None
+        self.exception = None
+
+    def run(self):
+        try:
+            self.solution = self._search_function()
+        except Exception as exception:
+            self.exception = exception
+
+
 class GraphicDecoratorFlyweight:
     def __init__(self, canvas):
         self._canvas = canvas
@@ -143,6 +143,14 @@ class QuadrillionStrategy:
         self._items = items
         self._other_strategy = None
         self._picked = set(self._items)
+        # the occupancy index maps each dot under a released item to this item, and occupancy_dots maps each
+        # released item to the dots at which it was added to the index. They are updated when items are picked,
+        # released or moved, so looking up the items at some dots does not scan all the released items.
+        self._occupancy = dict()
+        self._occupancy_dots = dict()
+        self._is_occupancy_overlapping = False
+        for item in self._items:
+            item.set_move_callback(self._on_item_moved)
 
     def reset(self, other_strategy):
         self._other_strategy = other_strategy
@@ -155,22 +163,19 @@ class QuadrillionStrategy:
 
     def release(self):
         if self.is_release_possible():
-            self._picked = set()
+            self._set_picked(set())
         else:
             raise IllegalReleaseException('It is not possible to release the picked'
                                           ' items with their current configuration!')
 
     def pick(self, items):
         if self.are_pickable(items):
-            self._picked = set(items)
+            self._set_picked(items)
         else:
             raise IllegalPickException('It is not possible to pick the selected items!')
 
     def get_at(self, dot):
-        for item in self.released_items:
-            if dot in item:
-                return item
-        return None
+        return self._occupancy.get(dot)
 
     def is_release_possible(self):
         return all(self.is_on_board(item) and not self.is_overlapping_released_items(item)
@@ -183,7 +188,47 @@ class QuadrillionStrategy:
         return all(0 <= y < self._dot_space_dim[0] and 0 <= x < self._dot_space_dim[1] for (y, x) in item)
 
     def is_overlapping_released_items(self, item):
-        return any(any(dot in other_item for other_item in self.released_items) for dot in item)
+        return any(dot in self._occupancy for dot in item)
+
+    def _set_picked(self, items):
+        items = set(items)
+        released_items, picked_items = self._picked - items, items - self._picked
+        for item in released_items:
+            self._add_to_occupancy(item)
+        for item in picked_items:
+            self._remove_from_occupancy(item)
+        self._picked = items
+        if released_items or picked_items:
+            self._on_released_items_change()
+
+    def _on_item_moved(self, item):
+        if item in self._occupancy_dots:
+            self._remove_from_occupancy(item)
+            self._add_to_occupancy(item)
+            self._on_released_items_change()
+
+    def _add_to_occupancy(self, item):
+        self._occupancy_dots[item] = dots = frozenset(item)
+        self._is_occupancy_overlapping |= not self._occupancy.keys().isdisjoint(dots)
+        self._occupancy.update(dict.fromkeys(dots, item))
+
+    def _remove_from_occupancy(self, item):
+        for dot in self._occupancy_dots.pop(item, ()):
+            del self._occupancy[dot]
+        if self._is_occupancy_overlapping:
+            # released items overlap only if their configs were set directly (not through pick and release),
+            # then the dots of the removed item may be under other released items, so the occupancy is rebuilt.
+            self._rebuild_occupancy()
+
+    def _rebuild_occupancy(self):
+        self._occupancy = dict()
+        self._is_occupancy_overlapping = False
+        for item in list(self._occupancy_dots):
+            self._add_to_occupancy(item)
+
+    def _on_released_items_change(self):
+        """called after the released items or their configs change"""
+        pass
 
     def _get_all_dots_list(self, items):
         return [dot for item in items for dot in item]
@@ -206,6 +251,10 @@ class QuadrillionStrategy:
 
 
 class GridQuadrillionStrategy(QuadrillionStrategy):
+    def __init__(self, dot_space_dim, items):
+        self._released_open_dots = frozenset()
+        QuadrillionStrategy.__init__(self, dot_space_dim, items)
+
     def is_release_possible(self):
         return QuadrillionStrategy.is_release_possible(self)\
                and not any(self._other_strategy.is_overlapping_released_items(grid) for grid in self.picked_items)
@@ -215,11 +264,17 @@ class GridQuadrillionStrategy(QuadrillionStrategy):
                or not any(self._other_strategy.is_overlapping_released_items(grid) for grid in grids)
 
     def is_on_released_open_dots(self, item):
-        return all(dot in self.released_open_dots for dot in item)
+        return item <= self.released_open_dots
 
     @property
     def released_open_dots(self):
-        return {dot for grid in self.released_items for dot in grid.open_dots}
+        """
+        the union of the open dots of the released grids, which is rebuilt only when they change
+        """
+        return self._released_open_dots
+
+    def _on_released_items_change(self):
+        self._released_open_dots = frozenset().union(*(grid.open_dots for grid in self.released_items))
 
 
 class ShapeQuadrillionStrategy(QuadrillionStrategy):
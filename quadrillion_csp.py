@@ -1,32 +1,135 @@
-import time
-from csp import CSP, CSPSolver
-from dots_set import connected_dots_sets
+from collections import defaultdict, OrderedDict
+from contextlib import nullcontext
+from csp import CSP, CSPSolver, SearchStats, BudgetExhausted, UNKNOWN
+from dots_set import connected_dots_sets, connected_dots_sizes, connected_masks, dots_to_mask, mask_to_dots,\
+    dots_symmetries, symmetric_dots
+from region_tilings import SHAPES_BITS, region_key, region_tilings
+from quadrillion_data import REGION_TILINGS_MAX_SIZE
 from quadrillion_exception import *
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it only speeds up the extraction of domains
+    np = None
 
 
 class QuadrillionCSPAdapter(CSP):
-    def __init__(self, quadrillion):
+    def __init__(self, quadrillion, solver=None, solution_cache=None, collect_stats=False,
+                 region_cache_size=2**16, repair=True, break_symmetries=True):
+        """
+        :param quadrillion: the game to be solved.
+        :param solver: a callable that takes a CSP and returns its first solution, None or UNKNOWN (like CSPSolver
+        or DLXSolver). CSPSolver is used by default. A solver with a Budget bounds the search, and
+        SearchAbortedException is raised when the budget is exhausted.
+        :param solution_cache: an optional SolutionCache that is looked up before searching for a solution.
+        :param collect_stats: if True, the statistics of the last solve (or count or iteration of solutions) are
+        kept in self.stats as a SearchStats object (see _new_stats for the collected statistics).
+        :param region_cache_size: the maximum number of verdicts memoized by _is_valid_empty_dots in
+        self.region_cache. The memoized verdicts are kept across solves.
+        :param repair: if True, a cached solution that no longer fits the game is repaired by searching again only
+        for the placements of the shapes around the changes (see _repair_solution).
+        :param break_symmetries: if True, the solutions that are symmetric to each other (when the empty dots are
+        symmetric) are searched for only once (see _break_symmetries).
+        """
         self.quadrillion = quadrillion
         self._solution = dict()
-        self._csp_solver = CSPSolver()
+        self._csp_solver = solver if solver else CSPSolver()
+        self._solution_cache = solution_cache
+        self._collect_stats = collect_stats
+        self.region_cache = RegionCache(region_cache_size)
+        self._repair = repair
+        self._break_symmetries_enabled = break_symmetries
 
     def solve(self):
         """
         Applies a solution (if found) to quadrillion game
         """
-        solution = self._get_solution()
-        for shape in self._variables:
-            shape.set_dots(solution[shape])
-        self.quadrillion.release()
+        self.apply_solution(self.find_solution())
 
     def help(self):
         """
         If a solution is found, one shape is moved to its configuration according to the solution.
         """
-        solution = self._get_solution()
-        shape = set(solution.keys()).pop()
-        shape.set_dots(solution[shape])
-        self.quadrillion.release()
+        self.apply_solution(self.find_solution(), nr_shapes=1)
+
+    def find_solution(self):
+        """
+        Uses the csp_solver to get a new solution if needed, otherwise adapts the cashed solution.
+        The game is not changed, so the solution can be searched for in a background thread while the game is
+        displayed (see QuadrillionSolverGraphicDisplay) and applied later by apply_solution.
+        :return: a solution dictionary containing the unplaced shapes and their corresponding dots.
+        """
+        if self.quadrillion.is_picked:
+            raise StateException('Cannot solve while items are picked.')
+        if self.quadrillion.is_won():
+            raise StateException("The game is already solved!")
+        self.stats = self._new_stats()
+        self._set_variables()
+        if self._is_new_solution_needed():
+            solution = self._repair_solution() if self._repair and self._solution else self._find_solution()
+            if solution is UNKNOWN:
+                raise SearchAbortedException('The solver gave up before finding a solution.')
+            elif solution:
+                self._cash_solution(solution)
+                return solution
+            else:
+                raise NoSolutionException('The current state of the game has no solution.')
+        else:
+            return self._adapt_solution()
+
+    def apply_solution(self, solution, nr_shapes=None):
+        """
+        moves shapes to their dots in the input solution (as returned by find_solution).
+        :param nr_shapes: the number of shapes to be moved, all shapes of the solution by default.
+        """
+        shapes = list(solution)[:nr_shapes]
+        try:
+            self.quadrillion.pick(shapes)
+        except StateException:
+            raise StateException('Cannot solve while items are picked.')
+        for shape in shapes:
+            shape.set_dots(solution[shape])
+        try:
+            self.quadrillion.release()
+        except IllegalReleaseException:
+            self.quadrillion.unpick()
+            raise StateException('The game was changed after the solution was found.')
+
+    def iter_solutions(self):
+        """
+        A generator that lazily yields all solutions of the current state of the game without applying them.
+        Each solution is a dictionary containing the unplaced shapes and their corresponding dots.
+        """
+        self._set_problem()
+        try:
+            for solution in self._csp_solver.iter_solutions(self):
+                solution = self._decoded_solution(solution)
+                yield solution
+                # the solutions symmetric to the found one are not searched for (see _break_symmetries)
+                for symmetry in self._solution_symmetries(solution)[1:]:
+                    yield {shape: frozenset(symmetric_dots(dots, symmetry)) for shape, dots in solution.items()}
+        except BudgetExhausted:
+            raise SearchAbortedException('The solver gave up before finding all solutions.')
+
+    def count_solutions(self, limit=None):
+        """
+        :param limit: if given, the counting stops after finding that many solutions.
+        :returns: the number of solutions of the current state of the game (or limit if there are more).
+        """
+        self._set_problem()
+        nr_solutions = 0
+        # each found solution stands for as many solutions as the orbit of its symmetric shape value
+        for orbit_size, domains in self._domains_by_orbit_size():
+            if domains is not self._domains:
+                self._set_domains(domains)
+            orbit_limit = None if limit is None else -(-(limit - nr_solutions) // orbit_size)
+            with self._timer('search'):
+                nr_orbits = self._csp_solver.count_solutions(self, orbit_limit)
+            if nr_orbits is UNKNOWN:
+                raise SearchAbortedException('The solver gave up before counting all solutions.')
+            nr_solutions += nr_orbits * orbit_size
+            if limit is not None and nr_solutions >= limit:
+                return limit
+        return nr_solutions
 
     @property
     def variables(self):
@@ -41,38 +144,234 @@ class QuadrillionCSPAdapter(CSP):
         for dots in assignments.values():
             self._current_assignments_dots |= dots
         return self._is_valid_empty_dots(self._empty_grids_dots-self._current_assignments_dots)\
-               and self._is_small_empty_dots_in_domain(assignments, domains)
+               and self._is_small_empty_dots_in_domain(assignments, domains)\
+               and self._are_medium_empty_dots_tileable(assignments)
+
+    def state_key(self, assignments):
+        # the remaining domains are the values that do not overlap the assigned ones
+        assigned_mask = 0
+        for value in assignments.values():
+            assigned_mask |= self._value_as_mask(value)
+        return assigned_mask, frozenset(assignments)
 
     def is_consistent_assignment(self, assignment):
         shape, dots = assignment
         return self._current_assignments_dots.isdisjoint(dots)
 
-    def _get_solution(self):
+    def inconsistent_values(self, assignment, variables, domains):
+        shape, value = assignment
+        return [shape_values for item in self.value_items(value) for shape_values in self._values_at_items[item]]
+
+    def picklable(self):
         """
-        Uses the csp_solver to get a new solution if needed, otherwise adapts the cashed solution
-        :return: a solution dictionary containing shapes and their corresponding dots.
+        :returns: an equivalent QuadrillionBitboardCSPAdapter that is detached from the game.
+        Its variables are the numbers of the shapes in self._ordered_variables, and its values are bitmasks.
         """
-        if self.quadrillion.is_won():
-            raise StateException("The game is already solved!")
-        try:
-            self._variables = self.quadrillion.released_unplaced_shapes
-            self._empty_grids_dots = self.quadrillion.released_empty_grids_dots
-            self.quadrillion.pick(self._variables)
-            if self._is_new_solution_needed():
-                start_time = time.time()
-                self._domains = self._extract_domains()
-                solution = self._csp_solver(self)
-                print("--- %s seconds ---" % (time.time() - start_time))
-                if solution:
-                    self._cash_solution(solution)
-                    return solution
-                else:
-                    self.quadrillion.unpick()
-                    raise NoSolutionException('The current state of the game has no solution.')
+        self._ordered_variables = list(self._variables)
+        picklable_csp = QuadrillionBitboardCSPAdapter(None)
+        picklable_csp._dot_space_dim = self.quadrillion.dot_space_dim
+        picklable_csp._variables = list(range(len(self._ordered_variables)))
+        picklable_csp._shapes_bits = {number: self._shapes_bits[shape]
+                                      for number, shape in enumerate(self._ordered_variables)}
+        picklable_csp._empty_grids_mask = dots_to_mask(self._empty_grids_dots, self.quadrillion.dot_space_dim[1])
+        picklable_csp._set_domains({number: dict.fromkeys(self._value_as_mask(value) for value in self._domains[shape])
+                                    for number, shape in enumerate(self._ordered_variables) if shape in self._domains})
+        return picklable_csp
+
+    def from_picklable_solution(self, solution):
+        return {self._ordered_variables[number]: self._mask_as_value(mask) for number, mask in solution.items()}
+
+    def _find_solution(self):
+        """
+        Looks up the solution cache (if any), otherwise uses the csp_solver to find a new solution.
+        :return: a solution dictionary containing shapes and their corresponding dots, None if there is not any
+        or UNKNOWN if the solver gave up.
+        """
+        if self._solution_cache is not None:
+            solution = self._solution_cache.get(self._empty_grids_dots, self._variables)
+            if solution:
+                if self.stats is not None:
+                    self.stats.count('solution_cache_hits')
+                return solution
+        solution = self._search_solution()
+        if solution and self._solution_cache is not None:
+            self._solution_cache.put(self._empty_grids_dots, solution)
+        return solution
+
+    def _repair_solution(self):
+        """
+        Keeps the placements of the cached solution that still fit the empty dots, and searches for new placements
+        only for the conflicting shapes and the shapes placed around the disturbed dots (the dots of the
+        conflicting placements and the empty dots that are not covered by the cached solution anymore).
+        The neighbourhood is widened by one dot in all directions until a solution is found. If all shapes are in
+        the neighbourhood, the whole problem is solved by _find_solution.
+        :return: a solution dictionary containing shapes and their corresponding dots, None if there is not any
+        or UNKNOWN if the solver gave up.
+        """
+        variables, empty_grids_dots = self._variables, self._empty_grids_dots
+        conflicting_dots = set()
+        covered_dots = set()
+        for shape in variables:
+            if self._is_on_empty_dots(self._solution[shape]):
+                covered_dots |= self._solution[shape]
             else:
-                return self._adapt_solution()
-        except StateException:
+                conflicting_dots |= self._solution[shape]
+        neighbourhood = conflicting_dots | (empty_grids_dots - covered_dots)
+        tried_shapes = set()
+        try:
+            while True:
+                freed_shapes = {shape for shape in variables if not self._solution[shape].isdisjoint(neighbourhood)}
+                if len(freed_shapes) == len(variables):
+                    break
+                if freed_shapes != tried_shapes:
+                    tried_shapes = freed_shapes
+                    kept_solution = {shape: self._solution[shape] for shape in variables if shape not in freed_shapes}
+                    self._variables = freed_shapes
+                    self._empty_grids_dots = empty_grids_dots.difference(*kept_solution.values())
+                    solution = self._search_solution()
+                    if solution is UNKNOWN:
+                        return solution
+                    elif solution:
+                        if self.stats is not None:
+                            self.stats.count('repairs')
+                        kept_solution.update(solution)
+                        return kept_solution
+                neighbourhood = {(y + dy, x + dx) for y, x in neighbourhood for dy in (-1, 0, 1) for dx in (-1, 0, 1)}
+        finally:
+            self._variables, self._empty_grids_dots = variables, empty_grids_dots
+        return self._find_solution()
+
+    def _search_solution(self):
+        """
+        uses the csp_solver to find a solution of the current variables and empty dots.
+        :return: a solution dictionary containing shapes and their corresponding dots, None if there is not any
+        or UNKNOWN if the solver gave up.
+        """
+        with self._timer('domains_extraction'):
+            self._set_domains(self._break_symmetries(self._extract_domains()))
+        with self._timer('search'):
+            solution = self._csp_solver(self)
+        if solution and solution is not UNKNOWN:
+            solution = self._decoded_solution(solution)
+        return solution
+
+    def _set_problem(self):
+        """
+        sets the variables, the empty dots and the domains of the current state of the game
+        without picking any shapes.
+        """
+        if self.quadrillion.is_picked:
             raise StateException('Cannot solve while items are picked.')
+        if self.quadrillion.is_won():
+            raise StateException("The game is already solved!")
+        self.stats = self._new_stats()
+        self._set_variables()
+        with self._timer('domains_extraction'):
+            self._set_domains(self._break_symmetries(self._extract_domains()))
+
+    def _break_symmetries(self, domains):
+        """
+        If the empty dots are symmetric (see dots_set.dots_symmetries), the domain of the shape with the most
+        values is restricted to one value of each orbit of its values under the symmetries. Every solution is then
+        symmetric to exactly one found solution, so a found solution stands for the solutions given by
+        the symmetries in self._orbits[its value of self._symmetric_shape].
+        :returns: the input domains after the restriction.
+        """
+        self._symmetric_shape = None
+        symmetries = dots_symmetries(self._empty_grids_dots) if self._empty_grids_dots else []
+        if not self._break_symmetries_enabled or len(symmetries) < 2 or not domains:
+            return domains
+        self._symmetric_shape = max(domains, key=lambda shape: len(domains[shape]))
+        self._orbits = dict()
+        restricted_domain = dict()
+        symmetric_values = set()
+        for value in domains[self._symmetric_shape]:
+            dots = self._value_as_dots(value)
+            if dots in symmetric_values:
+                continue
+            # the symmetries that map the value to distinct values, so each symmetric solution is given once
+            orbit = dict()
+            for symmetry in symmetries:
+                orbit.setdefault(frozenset(symmetric_dots(dots, symmetry)), symmetry)
+            symmetric_values.update(orbit)
+            self._orbits[dots] = list(orbit.values())
+            restricted_domain[value] = None
+        domains[self._symmetric_shape] = restricted_domain
+        return domains
+
+    def _solution_symmetries(self, solution):
+        """
+        :returns: the symmetries giving the solutions that the input decoded solution stands for (see
+        _break_symmetries), the first of which is the identity.
+        """
+        if self._symmetric_shape is None:
+            return [None]
+        return self._orbits[solution[self._symmetric_shape]]
+
+    def _domains_by_orbit_size(self):
+        """
+        A generator that yields tuples (orbit size, domains) where the domain of the symmetric shape in the domains
+        is restricted to the values whose orbits have that size (see _break_symmetries).
+        """
+        if self._symmetric_shape is None:
+            yield 1, self._domains
+            return
+        values_by_orbit_size = defaultdict(dict)
+        for value in self._domains[self._symmetric_shape]:
+            values_by_orbit_size[len(self._orbits[self._value_as_dots(value)])][value] = None
+        for orbit_size, values in sorted(values_by_orbit_size.items()):
+            domains = dict(self._domains)
+            domains[self._symmetric_shape] = values
+            yield orbit_size, domains
+
+    def _set_variables(self):
+        """
+        sets the variables (the unplaced shapes) and the empty dots of the current state of the game.
+        """
+        self._variables = self.quadrillion.released_unplaced_shapes
+        self._empty_grids_dots = self.quadrillion.released_empty_grids_dots
+        self._shapes_bits = {shape: SHAPES_BITS[shape.name] for shape in self._variables}
+
+    def _new_stats(self):
+        """
+        :returns: None if statistics are not collected, otherwise a new SearchStats object that counts:
+        nodes, backtracks and pruned_values: counted by the solver (see CSPSolver),
+        restarts: the number of restarted searches (see RestartSolver),
+        invalid_empty_dots: the number of times _is_valid_empty_dots found that empty dots cannot be filled,
+        forced_assignments: the number of assignments inferred by _is_small_empty_dots_in_domain,
+        solution_cache_hits: the number of solutions found in the solution cache,
+        repairs: the number of solutions found by repairing the cached solution (see _repair_solution),
+        region_cache_hits and region_cache_misses: the lookups of memoized verdicts in self.region_cache,
+        transposition_hits and transposition_misses: the lookups of the TranspositionTable of CSPSolver.
+        It also times the domains_extraction and the search.
+        """
+        if not self._collect_stats:
+            return None
+        return SearchStats('nodes', 'backtracks', 'pruned_values', 'restarts', 'invalid_empty_dots',
+                           'forced_assignments', 'solution_cache_hits', 'repairs', 'region_cache_hits',
+                           'region_cache_misses', 'transposition_hits', 'transposition_misses')
+
+    def _timer(self, timing):
+        """
+        :returns: a context manager that adds the time spent in its block to the input timing of self.stats
+        (if collected).
+        """
+        return self.stats.timer(timing) if self.stats is not None else nullcontext()
+
+    def _set_domains(self, domains):
+        """
+        sets the domains and indexes, for each item (dot) in their values, the values of each shape
+        covering it as (shape, values) tuples. This index gives the values removed by an assignment
+        in inconsistent_values.
+        """
+        self._domains = domains
+        values_at_items = defaultdict(lambda: defaultdict(list))
+        for shape, domain in domains.items():
+            for value in domain:
+                for item in self.value_items(value):
+                    values_at_items[item][shape].append(value)
+        self._values_at_items = defaultdict(list, {item: list(shapes_values.items())
+                                                   for item, shapes_values in values_at_items.items()})
 
     def _is_new_solution_needed(self):
         if self._solution:
@@ -102,34 +401,125 @@ class QuadrillionCSPAdapter(CSP):
 
     def _extract_domains(self):
         domains = dict()
+        self._empty_grids_array = None  # the empty dots as a numpy array, created by _fitting_locations
         if self._is_valid_empty_dots(self._empty_grids_dots):
             square_dots = self._get_smallest_square_over_dots(self._empty_grids_dots)
             for variable in self._variables:
-                domain = set()
-                for loc in square_dots:
-                    for config in variable.get_unique_configs_at(loc):
-                        dots = frozenset(variable.configured(config))
-                        if self._is_on_empty_dots(dots) and self._is_valid_empty_dots(self._empty_grids_dots-dots):
-                            domain.add(dots)
+                domain = dict()
+                for orientation, (y, x) in self._placements(variable, square_dots):
+                    dots = frozenset((y + dy, x + dx) for dy, dx in orientation)
+                    if self._is_on_empty_dots(dots) and self._is_valid_nr_empty_dots(self._empty_grids_dots-dots):
+                        domain[dots] = None
                 domains[variable] = domain
         return domains
 
+    def _placements(self, variable, square_dots):
+        """
+        A generator that yields a tuple (orientation, location) for each unique config of the variable at each
+        location in square_dots, where orientation is the dots of the config at the location (0, 0).
+        If numpy is installed, only the placements where the orientation is completely over empty dots are
+        yielded (see _fitting_locations), in the same order.
+        """
+        orientations = dict()
+        for config in variable.get_unique_configs_at((0, 0)):
+            orientation = frozenset(variable.configured(config))
+            fitting_locations = set(self._fitting_locations(orientation)) if np is not None else None
+            orientations[config.flips, config.rotations] = orientation, fitting_locations
+        for location in square_dots:
+            for config in variable.get_unique_configs_at(location):
+                orientation, fitting_locations = orientations[config.flips, config.rotations]
+                if fitting_locations is None or location in fitting_locations:
+                    yield orientation, location
+
+    def _fitting_locations(self, orientation):
+        """
+        finds the locations where the input orientation is completely over empty dots by one vectorized
+        sliding-window test of all locations using numpy.
+        :returns: a list of the locations.
+        """
+        height, width = self.quadrillion.dot_space_dim
+        if self._empty_grids_array is None:
+            # the array is padded so that the windows of all orientations at all locations are inside it
+            self._empty_grids_array = np.zeros((2 * height, 2 * width), dtype=bool)
+            self._empty_grids_array[tuple(np.array(sorted(self._empty_grids_dots)).T)] = True
+        fits = np.ones((height, width), dtype=bool)
+        for dy, dx in orientation:
+            fits &= self._empty_grids_array[dy:dy + height, dx:dx + width]
+        return list(map(tuple, np.argwhere(fits).tolist()))
+
     def _is_valid_empty_dots(self, empty_dots):
         """
         checks if the connected regions of the empty dots can be filled by shapes in the self._variables
         based on the number of dots in these connected components and in the shapes.
         Also, cashes the small connected components (5 or less dots) to check if they can be filled by a
         valid value in the domain of a variable.
+        The verdicts are memoized in self.region_cache keyed by the bitmask of the empty dots.
         """
-        self._connected_small_sets = []
+        key = self._value_as_mask(empty_dots)
+        verdict = self.region_cache.get(key)
+        if self.stats is not None:
+            self.stats.count('region_cache_misses' if verdict is None else 'region_cache_hits')
+        if verdict is None:
+            verdict = self._check_empty_dots(empty_dots)
+            self.region_cache.put(key, verdict)
+        is_valid, self._connected_small_sets, self._connected_medium_tilings = verdict
+        if not is_valid and self.stats is not None:
+            self.stats.count('invalid_empty_dots')
+        return is_valid
+
+    def _is_valid_nr_empty_dots(self, empty_dots):
+        """
+        the same check as _is_valid_empty_dots, but if the verdict is not memoized, it is based only on the sizes
+        of the connected components. So, the small connected components are not cached, and only
+        invalid verdicts are memoized.
+        """
+        key = self._value_as_mask(empty_dots)
+        verdict = self.region_cache.get(key)
+        if self.stats is not None:
+            self.stats.count('region_cache_misses' if verdict is None else 'region_cache_hits')
+        if verdict is None:
+            is_valid = self._check_nr_empty_dots(empty_dots)
+            if not is_valid:
+                self.region_cache.put(key, (False, (), ()))
+        else:
+            is_valid = verdict[0]
+        if not is_valid and self.stats is not None:
+            self.stats.count('invalid_empty_dots')
+        return is_valid
+
+    def _check_empty_dots(self, empty_dots):
+        """
+        :returns: a tuple (is valid, tuple of the small connected components, tuple of the tilings of the medium
+        connected components) as described in _is_valid_empty_dots and _medium_empty_dots_tilings.
+        """
+        small_connected_sets = []
+        medium_tilings = []
         nr_empty_dots = len(empty_dots)
         for connected_dots_set in connected_dots_sets(empty_dots):
             if not QuadrillionCSPAdapter._is_valid_nr_empty_connected_dots(nr_empty_dots,
                                                                           len(connected_dots_set)):
-                return False
+                return False, (), ()
             elif len(connected_dots_set) <= 5:
-                self._connected_small_sets.append(connected_dots_set)
-        return True
+                small_connected_sets.append(frozenset(connected_dots_set))
+            elif len(connected_dots_set) <= REGION_TILINGS_MAX_SIZE:
+                tilings = self._medium_empty_dots_tilings(connected_dots_set)
+                if tilings is None:
+                    return False, (), ()
+                medium_tilings.append(tilings)
+        return True, tuple(small_connected_sets), tuple(medium_tilings)
+
+    @staticmethod
+    def _medium_empty_dots_tilings(connected_dots):
+        """
+        :returns: the sets of shapes (see region_tilings.py) that can tile the input connected dots, which must
+        have 6 to REGION_TILINGS_MAX_SIZE dots, or None if no set of shapes can tile them.
+        """
+        return region_tilings().get(region_key(connected_dots))
+
+    def _check_nr_empty_dots(self, empty_dots):
+        nr_empty_dots = len(empty_dots)
+        return all(QuadrillionCSPAdapter._is_valid_nr_empty_connected_dots(nr_empty_dots, nr_empty_connected_dots)
+                   for nr_empty_connected_dots in connected_dots_sizes(empty_dots))
 
     def _is_small_empty_dots_in_domain(self, assignments, domains):
         """
@@ -141,20 +531,51 @@ class QuadrillionCSPAdapter(CSP):
             return True
         else:
             found_assignments = dict()
-            for connected_set in self._connected_small_sets:
-                target = frozenset(connected_set)
+            for target in self._connected_small_sets:
                 for var in set(domains.keys()) - set(assignments.keys()) - set(found_assignments.keys()):
                     if target in domains[var]:
                         found_assignments[var] = target
                         break
             if len(found_assignments) == len(self._connected_small_sets):
                 assignments.update(found_assignments)
+                if self.stats is not None:
+                    self.stats.count('forced_assignments', len(found_assignments))
                 for dots in found_assignments.values():
                     self._current_assignments_dots |= dots
                 return True
             else:
                 return False
 
+    def _are_medium_empty_dots_tileable(self, assignments):
+        """
+        checks if each medium connected component of the empty dots (6 to REGION_TILINGS_MAX_SIZE dots) can be tiled
+        by some of the unassigned shapes according to the precomputed region tilings (see region_tilings.py).
+        Components are checked separately, so two components needing the same shape are not detected.
+        """
+        if not self._connected_medium_tilings:
+            return True
+        unassigned_shapes = 0
+        for var in self._variables:
+            if var not in assignments:
+                unassigned_shapes |= self._shapes_bits[var]
+        return all(any(not shapes & ~unassigned_shapes for shapes in tilings)
+                   for tilings in self._connected_medium_tilings)
+
+    def _decoded_solution(self, solution):
+        """
+        :returns: the input solution with the values of all shapes represented as dots.
+        """
+        return solution
+
+    def _value_as_mask(self, value):
+        return dots_to_mask(value, self.quadrillion.dot_space_dim[1])
+
+    def _value_as_dots(self, value):
+        return value
+
+    def _mask_as_value(self, mask):
+        return frozenset(mask_to_dots(mask, self.quadrillion.dot_space_dim[1]))
+
     def _is_on_empty_dots(self, dots):
         return dots <= self._empty_grids_dots
 
@@ -186,3 +607,140 @@ class QuadrillionCSPAdapter(CSP):
             or ((nr_empty_dots - 7) % 5 == 0 and (nr_empty_connected_dots % 5 % 4 % 3 == 0
                                                   or ((nr_empty_connected_dots - 7) >= 0
                                                       and (nr_empty_connected_dots - 7) % 5 == 0))))
+
+
+class QuadrillionBitboardCSPAdapter(QuadrillionCSPAdapter):
+    """
+    A QuadrillionCSPAdapter where each value in the domains is an int bitmask over the dot space
+    (see dots_set.dots_to_mask) instead of a frozenset of dots. The empty grids dots are also kept
+    as a bitmask, so checking if an assignment overlaps the current assignments is a single bitwise and.
+    The bitmasks are converted back to dots only when a solution is found.
+    """
+    def register_current_assignments(self, assignments, domains):
+        self._current_assignments_dots = 0  # a bitmask of the dots of the current assignments
+        for mask in assignments.values():
+            self._current_assignments_dots |= mask
+        return self._is_valid_empty_dots(self._empty_grids_mask & ~self._current_assignments_dots)\
+               and self._is_small_empty_dots_in_domain(assignments, domains)\
+               and self._are_medium_empty_dots_tileable(assignments)
+
+    def is_consistent_assignment(self, assignment):
+        shape, mask = assignment
+        return not self._current_assignments_dots & mask
+
+    def value_items(self, mask):
+        items = []
+        while mask:
+            lowest_bit = mask & -mask
+            items.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+        return items
+
+    def _extract_domains(self):
+        domains = dict()
+        self._dot_space_dim = self.quadrillion.dot_space_dim
+        self._empty_grids_mask = self._to_mask(self._empty_grids_dots)
+        self._empty_grids_array = None
+        if self._is_valid_empty_dots(self._empty_grids_mask):
+            square_dots = self._get_smallest_square_over_dots(self._empty_grids_dots)
+            width = self._dot_space_dim[1]
+            orientations_masks = dict()
+            for variable in self._variables:
+                domain = dict()
+                for orientation, (y, x) in self._placements(variable, square_dots):
+                    if orientation not in orientations_masks:
+                        orientations_masks[orientation] = (self._to_mask(orientation),
+                                                           max(dx for dy, dx in orientation) + 1)
+                    orientation_mask, orientation_width = orientations_masks[orientation]
+                    if x + orientation_width > width:
+                        continue  # the shifted mask would wrap around to the next row
+                    mask = orientation_mask << (y * width + x)
+                    if not mask & ~self._empty_grids_mask\
+                            and self._is_valid_nr_empty_dots(self._empty_grids_mask & ~mask):
+                        domain[mask] = None
+                domains[variable] = domain
+        return domains
+
+    def _check_empty_dots(self, empty_mask):
+        """
+        the same as QuadrillionCSPAdapter._check_empty_dots but for empty dots given as a bitmask.
+        The small connected components are cached as bitmasks.
+        """
+        small_connected_masks = []
+        medium_tilings = []
+        nr_empty_dots = bin(empty_mask).count('1')
+        for connected_mask in connected_masks(empty_mask, self._dot_space_dim):
+            nr_empty_connected_dots = bin(connected_mask).count('1')
+            if not QuadrillionCSPAdapter._is_valid_nr_empty_connected_dots(nr_empty_dots,
+                                                                          nr_empty_connected_dots):
+                return False, (), ()
+            elif nr_empty_connected_dots <= 5:
+                small_connected_masks.append(connected_mask)
+            elif nr_empty_connected_dots <= REGION_TILINGS_MAX_SIZE:
+                tilings = self._medium_empty_dots_tilings(mask_to_dots(connected_mask, self._dot_space_dim[1]))
+                if tilings is None:
+                    return False, (), ()
+                medium_tilings.append(tilings)
+        return True, tuple(small_connected_masks), tuple(medium_tilings)
+
+    def _check_nr_empty_dots(self, empty_mask):
+        nr_empty_dots = bin(empty_mask).count('1')
+        return all(QuadrillionCSPAdapter._is_valid_nr_empty_connected_dots(nr_empty_dots,
+                                                                          bin(connected_mask).count('1'))
+                   for connected_mask in connected_masks(empty_mask, self._dot_space_dim))
+
+    def _decoded_solution(self, solution):
+        return {shape: frozenset(mask_to_dots(mask, self._dot_space_dim[1])) for shape, mask in solution.items()}
+
+    def _to_mask(self, dots):
+        return dots_to_mask(dots, self._dot_space_dim[1])
+
+    def _value_as_mask(self, mask):
+        return mask
+
+    def _value_as_dots(self, mask):
+        return frozenset(mask_to_dots(mask, self._dot_space_dim[1]))
+
+    def _mask_as_value(self, mask):
+        return mask
+
+
+class RegionCache:
+    """
+    A bounded memo of the verdicts of QuadrillionCSPAdapter._is_valid_empty_dots keyed by the bitmasks of
+    the empty dots. The least recently used verdicts are evicted first.
+    """
+    def __init__(self, max_size=2**16):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._verdicts = OrderedDict()
+
+    def get(self, key):
+        """
+        :returns: the memoized verdict of the input key or None.
+        """
+        verdict = self._verdicts.get(key)
+        if verdict is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._verdicts.move_to_end(key)
+        return verdict
+
+    def put(self, key, verdict):
+        self._verdicts[key] = verdict
+        if len(self._verdicts) > self.max_size:
+            self._verdicts.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        nr_lookups = self.hits + self.misses
+        return self.hits / nr_lookups if nr_lookups else 0.0
+
+    def __len__(self):
+        return len(self._verdicts)
+
+    def clear(self):
+        self._verdicts.clear()
+        self.hits = self.misses = 0
@@ -21,3 +21,10 @@ GRIDS = {'g1': (({(0,1)},       {(3,1)}),       (0, 0, (1, 4))),
 DOT_SPACE_DIM = (14, 16)
 
 SAVE_PATH = pathlib.Path(__file__).parent / 'saved'
+
+# where the solutions cache is saved (see solution_cache.py), which is not a saved game
+CACHE_PATH = pathlib.Path(__file__).parent / 'cache'
+
+# the table of the regions that can be tiled by shapes (see region_tilings.py)
+REGION_TILINGS_PATH = pathlib.Path(__file__).parent / 'region_tilings.pickle'
+REGION_TILINGS_MAX_SIZE = 10
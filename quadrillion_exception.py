@@ -22,4 +22,8 @@ class InitialConfigurationsException(IllegalReleaseException):
     pass
 
 class NoSolutionException(QuadrillionException):
+    pass
+
+
+class SearchAbortedException(QuadrillionException):
     pass
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+A table of the connected regions of 6 to REGION_TILINGS_MAX_SIZE dots that can be tiled exactly by distinct
+quadrillion shapes. Regions are keyed by their canonical form (see dots_set.canonical_dots) encoded as
+a bitmask, and each region has the sets of shapes (as bitmasks of SHAPES_BITS) that can tile it.
+Regions that are not in the table cannot be tiled by any set of shapes.
+The table is generated once by running this module from the quadrillion folder:
+
+    python region_tilings.py
+
+and it is loaded lazily from REGION_TILINGS_PATH the first time it is needed.
+"""
+import pickle
+from functools import lru_cache
+from dots_set import DIHEDRAL_TRANSFORMS, canonical_dots, dots_to_mask, normalized_dots, transformed_dots
+from quadrillion_data import SHAPES, REGION_TILINGS_PATH, REGION_TILINGS_MAX_SIZE
+
+# each shape is a bit in the sets of shapes that tile a region
+SHAPES_BITS = {name: 1 << number for number, name in enumerate(sorted(SHAPES))}
+
+
+def region_key(dots):
+    """
+    :returns: the key of the region of the input dots in the table (the bitmask of its canonical form).
+    """
+    return dots_to_mask(canonical_dots(dots)[0], REGION_TILINGS_MAX_SIZE)
+
+
+@lru_cache()
+def region_tilings():
+    """
+    :returns: the table as a dictionary of region keys and tuples of the sets of shapes that can tile them.
+    """
+    with REGION_TILINGS_PATH.open(mode='rb') as f:
+        return pickle.load(f)
+
+
+def polyominoes(size):
+    """
+    :returns: a set of the canonical forms of all connected regions (free polyominoes) of the input size.
+    """
+    regions = {((0, 0),)}
+    for _ in range(size - 1):
+        regions = {canonical_dots(set(region) | {neighbor})[0]
+                   for region in regions for y, x in region
+                   for neighbor in ((y+1, x), (y-1, x), (y, x+1), (y, x-1)) if neighbor not in region}
+    return regions
+
+
+def shapes_orientations():
+    """
+    :returns: a dictionary of shapes names and lists of their unique orientations. Each orientation is
+    a list of dots translated such that its first dot (in sorted order) is (0, 0).
+    """
+    orientations = dict()
+    for name, (dots, *_) in SHAPES.items():
+        unique_orientations = {tuple(sorted(normalized_dots(transformed_dots(dots, transform))[0]))
+                               for transform in DIHEDRAL_TRANSFORMS}
+        orientations[name] = [[(y - orientation[0][0], x - orientation[0][1]) for y, x in orientation]
+                              for orientation in sorted(unique_orientations)]
+    return orientations
+
+
+def tilings(region, orientations):
+    """
+    :param region: a set of dots.
+    :param orientations: the orientations of the shapes (see shapes_orientations)
+    :returns: a set of the sets of shapes (bitmasks of SHAPES_BITS) that tile the region exactly.
+    Each shape is used at most once.
+    """
+    found_tilings = set()
+
+    def tile(empty_dots, used_shapes):
+        if not empty_dots:
+            found_tilings.add(used_shapes)
+            return
+        y0, x0 = min(empty_dots)  # the first empty dot must be covered by the first dot of some orientation
+        for name, shape_orientations in orientations.items():
+            if used_shapes & SHAPES_BITS[name]:
+                continue
+            for orientation in shape_orientations:
+                dots = {(y0 + y, x0 + x) for y, x in orientation}
+                if dots <= empty_dots:
+                    tile(empty_dots - dots, used_shapes | SHAPES_BITS[name])
+
+    tile(set(region), 0)
+    return found_tilings
+
+
+def build_region_tilings(max_size=REGION_TILINGS_MAX_SIZE):
+    """
+    :returns: the table of all tileable regions of 6 to max_size dots (see region_tilings).
+    """
+    orientations = shapes_orientations()
+    table = dict()
+    for size in range(6, max_size + 1):
+        for region in polyominoes(size):
+            region_shapes = tilings(region, orientations)
+            if region_shapes:
+                table[region_key(region)] = tuple(sorted(region_shapes))
+    return table
+
+
+if __name__ == '__main__':
+    with REGION_TILINGS_PATH.open(mode='wb') as f:
+        pickle.dump(build_region_tilings(), f, protocol=pickle.HIGHEST_PROTOCOL)
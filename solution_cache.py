@@ -0,0 +1,94 @@
+import atexit
+import pickle
+from collections import OrderedDict
+from dots_set import canonical_dots, from_canonical_dots, transformed_dots
+from quadrillion_data import CACHE_PATH
+
+
+class SolutionCache:
+    """
+    A cache of quadrillion solutions keyed by the canonical form of the empty dots (see dots_set.canonical_dots)
+    together with the names of the shapes to be placed on them. So, a solution found for some empty dots
+    is reused for any empty dots that equal them up to translation, rotation and flipping.
+    The cache keeps the recently used solutions in memory (least recently used ones are evicted first) and
+    on disk under CACHE_PATH. It is saved after every save_interval new solutions and when the program exits.
+    """
+    def __init__(self, max_size=10000, file_name='solutions_cache', save_interval=100):
+        """
+        :param max_size: the maximum number of cached solutions.
+        :param file_name: the name of the file in CACHE_PATH where the cache is saved, or None to keep it
+        only in memory.
+        :param save_interval: the number of new solutions after which the cache is saved.
+        """
+        self.max_size = max_size
+        self.save_interval = save_interval
+        self._path = CACHE_PATH / (file_name + '.pickle') if file_name else None
+        self._solutions = None  # loaded lazily
+        self._nr_unsaved = 0
+        if self._path:
+            atexit.register(self.save)
+
+    def get(self, empty_dots, shapes):
+        """
+        :param empty_dots: the empty dots to be filled by the shapes.
+        :param shapes: the DotsSets to be placed on the empty dots.
+        :returns: a solution dictionary containing the shapes and their corresponding dots, or None if
+        there is no cached solution.
+        """
+        canonical, transform, translation = canonical_dots(empty_dots)
+        key = (canonical, frozenset(shape.name for shape in shapes))
+        solutions = self._get_solutions()
+        if key not in solutions:
+            return None
+        solutions.move_to_end(key)
+        return {shape: frozenset(from_canonical_dots(solutions[key][shape.name], transform, translation))
+                for shape in shapes}
+
+    def put(self, empty_dots, solution):
+        """
+        caches the input solution of the input empty dots, and saves the cache if it has save_interval
+        unsaved solutions.
+        :param solution: a dictionary containing the shapes and their corresponding dots.
+        """
+        canonical, transform, translation = canonical_dots(empty_dots)
+        key = (canonical, frozenset(shape.name for shape in solution))
+        solutions = self._get_solutions()
+        solutions[key] = {shape.name: self._to_canonical_frame(dots, transform, translation)
+                          for shape, dots in solution.items()}
+        solutions.move_to_end(key)
+        while len(solutions) > self.max_size:
+            solutions.popitem(last=False)
+        self._nr_unsaved += 1
+        if self._nr_unsaved >= self.save_interval:
+            self.save()
+
+    def __len__(self):
+        return len(self._get_solutions())
+
+    def clear(self):
+        self._solutions = OrderedDict()
+        self._nr_unsaved += 1
+        self.save()
+
+    def save(self):
+        """
+        saves the cache on disk if it has unsaved changes.
+        """
+        if self._path and self._nr_unsaved:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with self._path.open(mode='wb') as f:
+                pickle.dump(self._solutions, f)
+        self._nr_unsaved = 0
+
+    @staticmethod
+    def _to_canonical_frame(dots, transform, translation):
+        dy, dx = translation
+        return tuple(sorted((y - dy, x - dx) for y, x in transformed_dots(dots, transform)))
+
+    def _get_solutions(self):
+        if self._solutions is None:
+            self._solutions = OrderedDict()
+            if self._path and self._path.exists():
+                with self._path.open(mode='rb') as f:
+                    self._solutions = pickle.load(f)
+        return self._solutions
@@ -0,0 +1,78 @@
+import json
+import pickle
+import shutil
+import subprocess
+import sys
+import pytest
+import batch_solve
+from batch_solve import game_files, solve_game, solve_games
+from quadrillion_data import SAVE_PATH
+
+PACKAGE_PATH = SAVE_PATH.parent
+
+
+def test_game_files_of_directory_and_files():
+    files = game_files([SAVE_PATH, SAVE_PATH / 'game00.pickle'])
+    assert files[-1] == SAVE_PATH / 'game00.pickle'
+    assert set(files[:-1]) == set(SAVE_PATH.glob('*.pickle'))
+
+
+def test_game_files_skip_pickles_of_other_objects(tmp_path):
+    shutil.copy(SAVE_PATH / 'game50.pickle', tmp_path / 'game50.pickle')
+    with (tmp_path / 'solutions_cache.pickle').open(mode='wb') as f:
+        pickle.dump({((0, 0),): {'s1': ((0, 0),)}}, f)
+    (tmp_path / 'corrupt.pickle').write_bytes(b'not a pickle')
+    assert game_files([tmp_path]) == [tmp_path / 'corrupt.pickle', tmp_path / 'game50.pickle']
+
+
+def test_solve_corrupt_game_gives_error(tmp_path):
+    (tmp_path / 'corrupt.pickle').write_bytes(b'not a pickle')
+    results = list(solve_games([tmp_path / 'corrupt.pickle', SAVE_PATH / 'game50.pickle'], max_workers=1))
+    results = {result['name']: result for result in results}
+    assert 'error' in results['corrupt'] and results['corrupt']['solvable'] is None
+    assert results['game50']['solvable']
+
+
+@pytest.mark.parametrize('solver', batch_solve.SOLVERS)
+def test_solve_game(solver):
+    result = solve_game(SAVE_PATH / 'game50.pickle', solver)
+    assert result['name'] == 'game50'
+    assert result['solvable']
+    assert len(result['placements']) == 12
+    assert result['nodes'] > 0
+
+
+def test_solve_game_with_timeout_gives_unknown_result():
+    result = solve_game(SAVE_PATH / 'game58.pickle', timeout=0)
+    assert result['solvable'] is None
+    assert result['placements'] is None
+    assert 'error' not in result
+
+
+def test_solve_missing_game_gives_error():
+    result = solve_game(SAVE_PATH / 'missing_game.pickle')
+    assert result['solvable'] is None
+    assert 'error' in result
+
+
+def test_solve_games():
+    paths = [SAVE_PATH / 'game50.pickle', SAVE_PATH / 'game51.pickle']
+    results = list(solve_games(paths, max_workers=2))
+    assert {result['name'] for result in results} == {'game50', 'game51'}
+    assert all(result['solvable'] for result in results)
+
+
+def test_command_line_solves_without_tkinter():
+    script = ('import runpy, sys\n'
+              'package_path, sys.argv = sys.argv[1], ["quadrillion"] + sys.argv[2:]\n'
+              'runpy.run_path(package_path, run_name="__main__")\n'
+              'assert "tkinter" not in sys.modules\n')
+    output = subprocess.run([sys.executable, '-c', script, str(PACKAGE_PATH), str(SAVE_PATH / 'game50.pickle'),
+                             '--workers', '1'], capture_output=True, text=True, check=True).stdout
+    result = json.loads(output)
+    assert result['name'] == 'game50'
+    assert result['solvable']
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,34 @@
+import pytest
+from benchmark import percentile, regressions, generated_board, GRIDS_LOCATIONS
+
+
+def test_percentile():
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile(range(100), 95) == 94
+    assert percentile([5], 95) == 5
+
+
+def test_regressions_past_threshold():
+    baseline = {'bitboard': {'game00': {'median': 1.0, 'p95': 1.2, 'nodes': 100},
+                             'game49': {'median': 1.0, 'p95': 1.2, 'nodes': 100}}}
+    results = {'bitboard': {'game00': {'median': 1.2, 'p95': 2.0, 'nodes': 120},
+                            'game49': {'median': 1.5, 'p95': 1.6, 'nodes': 130},
+                            'game50': {'median': 9.0, 'p95': 9.0, 'nodes': 900}},
+               'dlx': {'game00': {'median': 9.0, 'p95': 9.0, 'nodes': 900}}}
+
+    messages = regressions(results, baseline, threshold=0.25)
+    assert len(messages) == 2
+    assert all(message.startswith('game49 bitboard') for message in messages)
+
+
+def test_generated_board_is_reproducible():
+    grids_configs = []
+    for _ in range(2):
+        quadrillion = generated_board(3)()
+        grids_configs.append({grid.name: grid.config for grid in quadrillion.grids})
+        assert sorted(config.location for config in grids_configs[-1].values()) == sorted(GRIDS_LOCATIONS)
+    assert grids_configs[0] == grids_configs[1]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,119 @@
+import pytest
+import time
+from csp import TrailedDomains, ItemIndexedDomains, MostConstrainedItem, Budget, BudgetExhausted,\
+    CancellationToken, SearchStats, TranspositionTable, luby
+
+
+@pytest.fixture()
+def trailed_domains():
+    return TrailedDomains({'a': {1: None, 2: None, 3: None}, 'b': {4: None, 5: None}})
+
+
+def test_trailed_domains_remove_values_in_place(trailed_domains):
+    trailed_domains.remove('a', [2, 6])
+    assert list(trailed_domains['a']) == [1, 3]
+    assert len(trailed_domains['a']) == 2
+    assert 2 not in trailed_domains['a']
+    assert 3 in trailed_domains['a']
+
+
+def test_trailed_domains_undo_restores_values_in_order(trailed_domains):
+    trailed_domains.remove('a', [1])
+    trail_mark = trailed_domains.mark()
+    trailed_domains.remove('a', [1, 3])
+    trailed_domains.remove('b', [4, 5])
+    assert not trailed_domains['b']
+
+    trailed_domains.undo(trail_mark)
+    assert list(trailed_domains['a']) == [2, 3]
+    assert list(trailed_domains['b']) == [4, 5]
+    trailed_domains.undo(0)
+    assert list(trailed_domains['a']) == [1, 2, 3]
+
+
+def test_trailed_domains_copy(trailed_domains):
+    trailed_domains.remove('a', [2])
+    assert trailed_domains.copy(['a']) == {'a': {1: None, 3: None}}
+
+
+@pytest.fixture()
+def item_indexed_domains():
+    return ItemIndexedDomains({'a': {(1, 2): None, (2, 3): None}, 'b': {(1, 3): None, (3, 4): None, (2, 4): None}},
+                              lambda val: val)
+
+
+def test_item_indexed_domains_count_candidates(item_indexed_domains):
+    assert item_indexed_domains.nr_candidates == {1: 2, 2: 3, 3: 3, 4: 2}
+
+    trail_mark = item_indexed_domains.mark()
+    item_indexed_domains.remove('b', [(1, 3), (3, 4)])
+    assert item_indexed_domains.nr_candidates == {1: 1, 2: 3, 3: 1, 4: 1}
+
+    item_indexed_domains.undo(trail_mark)
+    assert item_indexed_domains.nr_candidates == {1: 2, 2: 3, 3: 3, 4: 2}
+
+
+def test_most_constrained_item_branches_on_item_with_fewest_candidates(item_indexed_domains):
+    item_indexed_domains.assign('b', (3, 4))
+    branches = MostConstrainedItem().branches({'b': (3, 4)}, item_indexed_domains)
+    assert branches == [('a', (1, 2))]
+
+
+def test_budget_is_exhausted_by_nodes():
+    budget = Budget(max_nodes=10)
+    budget.start()
+    budget.check(10)
+    with pytest.raises(BudgetExhausted):
+        budget.check(11)
+
+
+def test_budget_is_exhausted_by_timeout():
+    budget = Budget(timeout=0.01)
+    budget.start()
+    budget.check(1)
+    time.sleep(0.02)
+    with pytest.raises(BudgetExhausted):
+        budget.check(1)
+
+
+def test_budget_is_exhausted_by_cancellation():
+    cancellation_token = CancellationToken()
+    budget = Budget(cancellation_token=cancellation_token)
+    budget.start()
+    budget.check(1)
+    cancellation_token.cancel()
+    with pytest.raises(BudgetExhausted):
+        budget.check(1)
+
+
+def test_search_stats_as_dict():
+    stats = SearchStats('nodes', 'backtracks')
+    stats.count('nodes')
+    stats.count('nodes', 2)
+    stats.count('pruned_values', 5)
+    with stats.timer('search'):
+        time.sleep(0.01)
+
+    stats_dict = stats.as_dict()
+    assert stats_dict.pop('search_time') >= 0.01
+    assert stats_dict == {'nodes': 3, 'backtracks': 0, 'pruned_values': 5}
+
+
+def test_transposition_table_evicts_least_recently_used_failure():
+    transposition_table = TranspositionTable(max_size=2)
+    transposition_table.add_failure('a')
+    transposition_table.add_failure('b')
+    assert transposition_table.has_failed('a')
+    transposition_table.add_failure('c')
+
+    assert len(transposition_table) == 2
+    assert not transposition_table.has_failed('b')
+    assert transposition_table.has_failed('a') and transposition_table.has_failed('c')
+
+
+def test_luby_sequence():
+    assert [luby(i) for i in range(1, 16)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+
+
+if __name__ == '__main__':
+    pytest.main()
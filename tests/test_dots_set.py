@@ -1,5 +1,7 @@
 import pytest
-from dots_set import DotsSet, DotsGrid, DotsSetFactory, Config, connected_dots_sets
+from dots_set import DotsSet, DotsGrid, DotsSetFactory, Config, connected_dots_sets, connected_dots_sizes,\
+    connected_masks, dots_to_mask, mask_to_dots, DIHEDRAL_TRANSFORMS, transformed_dots, canonical_dots,\
+    from_canonical_dots, dots_symmetries, symmetric_dots
 
 """
 shapes:
@@ -94,6 +96,44 @@ class TestDotsSetInstantiation:
             dots_set.set_dots({(0, 0), (1, 1)})
         assert dots_set == dots_before
 
+    @pytest.mark.parametrize('dots', [set(), {(3, 3), (3, 4), (4, 4)}, {(0, 0), (0, 1), (1, 2), (1, 3), (1, 4)}])
+    def test_set_dots_fails_with_clear_error(self, dots):
+        dots_set = DotsSet(SHAPES[0])
+        with pytest.raises(ValueError, match='do not correspond to any config'):
+            dots_set.set_dots(dots)
+        assert dots_set.config == Config(0, 0, (0, 0))
+
+    def test_set_dots_finds_the_config_of_every_orientation(self):
+        dots_set = DotsSet(SHAPES[0])
+        for flips in range(2):
+            for rotations in range(4):
+                dots = {(y + 3, x + 5) for y, x in SHAPES[flips * 4 + rotations]}
+                dots_set.set_dots(dots)
+                assert dots_set.config == Config(flips, rotations, (3, 5))
+                assert set(dots_set) == dots
+
+    def test_orientations_are_shared_by_equal_dots_sets(self):
+        dots_set1, dots_set2 = DotsSet(SHAPES[0]), DotsSet(SHAPES[0], Config(1, 3, (4, 2)))
+        assert dots_set1._orientations is dots_set2._orientations
+        assert dots_set1.configured(dots_set2.config) is dots_set2.configured(dots_set2.config)
+        assert [dots_set1.configured(Config(flips, rotations, (0, 0)))
+                for flips in range(2) for rotations in range(4)] == SHAPES
+
+    def test_dots_sets_have_no_instance_dict(self):
+        assert not hasattr(DotsSet(SHAPES[0]), '__dict__')
+        assert not hasattr(DotsGrid(GRIDS_CLOSED_DOTS[0], GRIDS_CLOSED_DOTS[4]), '__dict__')
+
+    @pytest.mark.parametrize('location', [(0, 0), (1, 1), (0, -1)])
+    def test_set_operations_between_dots_sets(self, location):
+        dots_set1 = DotsSet(SHAPES[0], Config(0, 0, location))
+        dots_set2 = DotsSet(SHAPES[3], Config(0, 0, (0, 1)))
+        dots1, dots2 = set(dots_set1), set(dots_set2)
+
+        assert dots_set1 & dots_set2 == dots1 & dots2
+        assert dots_set1.isdisjoint(dots_set2) == dots1.isdisjoint(dots2)
+        assert (dots_set1 <= dots_set2) == (dots1 <= dots2)
+        assert (dots_set2 <= DotsGrid(set(), set(), 4, 4)) == (dots2 <= set(DotsGrid(set(), set(), 4, 4)))
+
 
 
 
@@ -345,6 +385,47 @@ class TestConnectedDotsSets:
         assert connected_set2 in connected_sets
 
 
+class TestDotsMasks:
+    def test_mask_to_dots_inverses_dots_to_mask(self):
+        dots = {(0, 0), (0, 15), (1, 0), (13, 15), (7, 9)}
+        assert mask_to_dots(dots_to_mask(dots)) == dots
+        assert dots_to_mask(set()) == 0
+
+    def test_connected_masks_equals_connected_dots_sets(self):
+        """
+        O O O O . . . . . . . . . . . O  <- last column must not connect to the first one
+        . . . O . . . . . . . . . . . .
+        O O O . . . . . . . . . . . . .
+        O O O O . . . . . . . . . . . .
+        """
+        dots = {(0, 0), (0, 1), (0, 2), (0, 3), (1, 3), (0, 15),
+                (2, 0), (2, 1), (2, 2), (3, 0), (3, 1), (3, 2), (3, 3)}
+        connected_sets = [mask_to_dots(mask) for mask in connected_masks(dots_to_mask(dots))]
+
+        assert len(connected_sets) == 3
+        assert all(connected_set in connected_sets for connected_set in connected_dots_sets(dots))
+        assert sorted(connected_dots_sizes(dots)) == sorted(len(connected_set) for connected_set in connected_sets)
+
+    @pytest.mark.parametrize('transform', DIHEDRAL_TRANSFORMS)
+    def test_canonical_dots_is_invariant_to_symmetries(self, transform):
+        dots = {(0, 0), (0, 1), (0, 2), (1, 0), (2, 5)}
+        moved_dots = {(y + 3, x + 7) for y, x in transformed_dots(dots, transform)}
+
+        canonical, canonical_transform, translation = canonical_dots(moved_dots)
+        assert canonical == canonical_dots(dots)[0]
+        assert from_canonical_dots(canonical, canonical_transform, translation) == moved_dots
+
+    @pytest.mark.parametrize('dots, nr_symmetries', [({(y, x) for y in range(3, 7) for x in range(2, 6)}, 8),
+                                                     ({(y, x) for y in range(3, 5) for x in range(2, 6)}, 4),
+                                                     ({(1, 1), (1, 2), (2, 2)}, 2),
+                                                     ({(0, 0), (0, 1), (0, 2), (1, 0)}, 1)])
+    def test_dots_symmetries(self, dots, nr_symmetries):
+        symmetries = dots_symmetries(dots)
+        assert len(symmetries) == nr_symmetries
+        assert symmetries[0] == (DIHEDRAL_TRANSFORMS[0], (0, 0))
+        assert all(symmetric_dots(dots, symmetry) == dots for symmetry in symmetries)
+
+
 class TestDotsSetFactory:
     @pytest.fixture(scope='class')
     def dots_set_factory(self):
@@ -245,3 +245,33 @@ def test_is_won(quadrillion_game, sorted_shapes):
         shape.config = Config(*config)
 
     assert quadrillion_game.is_won()
+
+
+def test_released_empty_grids_dots_follow_grids_configs(quadrillion_game, sorted_grids):
+    def expected_empty_grids_dots():
+        return {dot for grid in sorted_grids for dot in grid.open_dots}\
+               - {dot for shape in quadrillion_game.released_shapes for dot in shape}
+
+    assert quadrillion_game.released_empty_grids_dots == expected_empty_grids_dots()
+    sorted_grids[0].config = Config(1, 2, (0, 0))
+    assert quadrillion_game.released_empty_grids_dots == expected_empty_grids_dots()
+
+    quadrillion_game.pick([sorted_grids[1]])
+    assert quadrillion_game.released_empty_grids_dots == expected_empty_grids_dots() - set(sorted_grids[1])
+
+
+def test_get_at_follows_items_moved_directly_over_each_other(quadrillion_game, sorted_shapes):
+    def expected_item_at(dot):
+        return next((shape for shape in sorted_shapes if dot in shape),
+                    next((grid for grid in quadrillion_game.grids if dot in grid), None))
+
+    sorted_shapes[0].config = sorted_shapes[1].config  # the first two shapes overlap for a while
+    sorted_shapes[1].move((1, 1))
+    sorted_shapes[0].move((5, 5))
+    for dot in ((y, x) for y in range(quadrillion_game.dot_space_dim[0])
+                for x in range(quadrillion_game.dot_space_dim[1])):
+        if expected_item_at(dot) is None:
+            with pytest.raises(NoItemException):
+                quadrillion_game.get_at(dot)
+        else:
+            assert quadrillion_game.get_at(dot) is expected_item_at(dot)
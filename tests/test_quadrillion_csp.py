@@ -1,18 +1,35 @@
+import itertools
+import multiprocessing
 import pytest
 from unittest import mock
+from csp import CSPSolver, DLXSolver, ParallelSolver, RestartSolver, MostConstrainedItem, Budget, CancellationToken,\
+    UNKNOWN
 from quadrillion import Quadrillion
-from quadrillion_csp import QuadrillionCSPAdapter
+from quadrillion_csp import QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter, RegionCache
 from quadrillion_data import SAVE_PATH
-from dots_set import Config
+from dots_set import Config, dots_to_mask
+from region_tilings import SHAPES_BITS
 from quadrillion_exception import *
 
 
-@pytest.fixture()
-def quadrillion_csp():
-    return QuadrillionCSPAdapter(Quadrillion())
+adapters_factories = {'sets': QuadrillionCSPAdapter,
+                      'bitboard': QuadrillionBitboardCSPAdapter,
+                      'dlx': lambda quadrillion: QuadrillionCSPAdapter(quadrillion, DLXSolver()),
+                      'bitboard-dlx': lambda quadrillion: QuadrillionBitboardCSPAdapter(quadrillion, DLXSolver()),
+                      'parallel': lambda quadrillion: QuadrillionCSPAdapter(quadrillion, ParallelSolver(2)),
+                      'cell-first': lambda quadrillion: QuadrillionCSPAdapter(quadrillion,
+                                                                              CSPSolver(MostConstrainedItem())),
+                      'bitboard-cell-first': lambda quadrillion: QuadrillionBitboardCSPAdapter(
+                          quadrillion, CSPSolver(MostConstrainedItem()))}
 
 
-saved_games_files = [file.name.split('.')[0] for file in SAVE_PATH.iterdir() if file.name.startswith('game')]
+@pytest.fixture(params=adapters_factories.values(), ids=adapters_factories.keys())
+def quadrillion_csp(request):
+    return request.param(Quadrillion())
+
+
+saved_games_files = sorted(file.name.split('.')[0] for file in SAVE_PATH.iterdir() if file.name.startswith('game'))
+unique_solution_game_file = 'game59'  # a saved game that has exactly one solution
 
 
 @pytest.mark.parametrize('game_file', saved_games_files)
@@ -22,6 +39,52 @@ def test_adapter_solves_game(quadrillion_csp, game_file):
     assert quadrillion_csp.quadrillion.is_won()
 
 
+@pytest.mark.parametrize('game_file', saved_games_files)
+def test_bitboard_adapter_finds_same_solution(game_file):
+    solutions = []
+    for adapter_class in QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter:
+        quadrillion = Quadrillion()
+        quadrillion.load_game(game_file)
+        adapter_class(quadrillion).solve()
+        solutions.append({frozenset(shape) for shape in quadrillion.shapes})
+    assert solutions[0] == solutions[1]
+
+
+def test_cell_first_branching_needs_fewer_nodes():
+    nr_nodes = []
+    for branching in None, MostConstrainedItem():
+        quadrillion = Quadrillion()
+        quadrillion.load_game(unique_solution_game_file)
+        solver = CSPSolver(branching)
+        QuadrillionBitboardCSPAdapter(quadrillion, solver).solve()
+        assert quadrillion.is_won()
+        nr_nodes.append(solver.nr_nodes)
+    assert nr_nodes[1] < nr_nodes[0]
+
+
+def test_count_solutions_of_game_with_unique_solution(quadrillion_csp):
+    quadrillion_csp.quadrillion.load_game(unique_solution_game_file)
+    assert quadrillion_csp.count_solutions() == 1
+
+
+def test_count_solutions_stops_at_limit(quadrillion_csp):
+    assert quadrillion_csp.count_solutions(limit=3) == 3
+
+
+def test_iter_solutions_yields_different_valid_solutions(quadrillion_csp):
+    empty_dots = quadrillion_csp.quadrillion.released_empty_grids_dots
+    solutions = []
+    for solution in quadrillion_csp.iter_solutions():
+        assert set(solution) == quadrillion_csp.quadrillion.shapes
+        assert sum(len(dots) for dots in solution.values()) == len(empty_dots)
+        assert set().union(*solution.values()) == empty_dots
+        solutions.append(solution)
+        if len(solutions) == 3:
+            break
+    assert all(solutions[i] != solutions[j] for i in range(3) for j in range(i))
+    assert not quadrillion_csp.quadrillion.is_won()
+
+
 def test_help(quadrillion_csp):
     assert quadrillion_csp.quadrillion.shapes == quadrillion_csp.quadrillion.released_unplaced_shapes
     for i in range(len(quadrillion_csp.quadrillion.shapes)):
@@ -31,6 +94,33 @@ def test_help(quadrillion_csp):
     assert quadrillion_csp.quadrillion.is_won()
 
 
+def test_find_solution_does_not_change_game(quadrillion_csp):
+    quadrillion = quadrillion_csp.quadrillion
+    configs = {shape: shape.config for shape in quadrillion.shapes}
+    solution = quadrillion_csp.find_solution()
+    assert {shape: shape.config for shape in quadrillion.shapes} == configs
+    assert not quadrillion.is_picked
+
+    quadrillion_csp.apply_solution(solution, nr_shapes=1)
+    assert len(quadrillion.released_unplaced_shapes) == len(solution) - 1
+    quadrillion_csp.apply_solution(quadrillion_csp.find_solution())
+    assert quadrillion.is_won()
+
+
+def test_cancelled_search_can_be_restarted():
+    cancellation_token = CancellationToken()
+    quadrillion = Quadrillion()
+    solver = CSPSolver(budget=Budget(cancellation_token=cancellation_token))
+    quadrillion_csp = QuadrillionCSPAdapter(quadrillion, solver)
+    cancellation_token.cancel()
+    with pytest.raises(SearchAbortedException):
+        quadrillion_csp.find_solution()
+
+    cancellation_token.reset()
+    quadrillion_csp.solve()
+    assert quadrillion.is_won()
+
+
 def test_solve_reuses_last_found_solution(quadrillion_csp):
     quadrillion_csp.solve()
     quadrillion_csp.quadrillion.reset()
@@ -69,5 +159,207 @@ def test_solve_unsolvable_game_raises_exception(quadrillion_csp):
         quadrillion_csp.solve()
 
 
+@pytest.mark.parametrize('adapter_class', [QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter])
+def test_solve_collects_stats(adapter_class, capsys):
+    quadrillion = Quadrillion()
+    quadrillion.load_game(unique_solution_game_file)
+    quadrillion_csp = adapter_class(quadrillion, CSPSolver(), collect_stats=True)
+    quadrillion_csp.solve()
+
+    stats = quadrillion_csp.stats.as_dict()
+    assert stats['nodes'] == quadrillion_csp._csp_solver.nr_nodes
+    assert stats['backtracks'] > 0
+    assert stats['pruned_values'] > 0
+    assert stats['invalid_empty_dots'] > 0
+    assert stats['forced_assignments'] > 0
+    assert stats['search_time'] > 0
+    assert stats['domains_extraction_time'] > 0
+    assert capsys.readouterr().out == ''
+
+
+def test_stats_are_not_collected_by_default(quadrillion_csp):
+    quadrillion_csp.solve()
+    assert quadrillion_csp.stats is None
+
+
+def test_region_cache_evicts_least_recently_used_verdict():
+    region_cache = RegionCache(max_size=2)
+    # verdicts are (is valid, small connected components, tilings of medium connected components)
+    small_verdict = (True, (frozenset({(0, 0), (0, 1), (1, 0)}),), ())
+    medium_verdict = (True, (), ((SHAPES_BITS['sb'] | SHAPES_BITS['s<'],),))
+    region_cache.put(1, small_verdict)
+    region_cache.put(2, (False, (), ()))
+    assert region_cache.get(1) == small_verdict
+    region_cache.put(3, medium_verdict)
+
+    assert len(region_cache) == 2
+    assert region_cache.get(2) is None
+    assert region_cache.get(3) == medium_verdict
+    assert region_cache.hit_rate == 2 / 3
+
+
+@pytest.mark.parametrize('adapter_class', [QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter])
+def test_region_cache_is_reused_across_solves(adapter_class):
+    quadrillion = Quadrillion()
+    quadrillion.load_game(unique_solution_game_file)
+    quadrillion_csp = adapter_class(quadrillion, CSPSolver(), collect_stats=True)
+    quadrillion_csp.solve()
+    solution = {frozenset(shape) for shape in quadrillion.shapes}
+    misses = quadrillion_csp.stats.counters['region_cache_misses']
+
+    quadrillion.reset()
+    quadrillion_csp._solution = dict()  # forces searching for a new solution
+    quadrillion_csp.solve()
+    assert {frozenset(shape) for shape in quadrillion.shapes} == solution
+    assert quadrillion_csp.stats.counters['region_cache_misses'] < misses
+    assert quadrillion_csp.stats.counters['region_cache_hits'] > 0
+
+
+def test_region_cache_can_be_disabled():
+    quadrillion_csp = QuadrillionBitboardCSPAdapter(Quadrillion(), region_cache_size=0)
+    quadrillion_csp.solve()
+    assert quadrillion_csp.quadrillion.is_won()
+    assert len(quadrillion_csp.region_cache) == 0
+
+
+@pytest.mark.parametrize('solver', [CSPSolver(budget=Budget(max_nodes=10)),
+                                    CSPSolver(budget=Budget(timeout=0)),
+                                    ParallelSolver(2, budget=Budget(max_nodes=2))],
+                         ids=['nodes', 'timeout', 'parallel'])
+def test_solve_with_exhausted_budget_raises_exception(solver):
+    quadrillion = Quadrillion()
+    quadrillion.load_game(unique_solution_game_file)
+    quadrillion_csp = QuadrillionCSPAdapter(quadrillion, solver)
+
+    with pytest.raises(SearchAbortedException):
+        quadrillion_csp.solve()
+    with pytest.raises(SearchAbortedException):
+        quadrillion_csp.count_solutions()
+    assert not quadrillion.is_picked
+
+
+def test_cancelled_solver_returns_unknown():
+    cancellation_token = CancellationToken()
+    cancellation_token.cancel()
+    quadrillion_csp = QuadrillionCSPAdapter(Quadrillion())
+    quadrillion_csp._set_problem()
+
+    assert CSPSolver(budget=Budget(cancellation_token=cancellation_token))(quadrillion_csp) is UNKNOWN
+    assert ParallelSolver(2, budget=Budget(cancellation_token=cancellation_token))(quadrillion_csp) is UNKNOWN
+
+
+def test_parallel_solver_stops_its_processes_after_first_solution():
+    quadrillion_csp = QuadrillionCSPAdapter(Quadrillion(), ParallelSolver(2))
+    quadrillion_csp.solve()
+    assert quadrillion_csp.quadrillion.is_won()
+    assert not multiprocessing.active_children()
+
+
+@pytest.mark.parametrize('adapter_class', [QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter])
+def test_medium_empty_dots_that_cannot_be_tiled_are_invalid(adapter_class):
+    quadrillion_csp = adapter_class(Quadrillion())
+    quadrillion_csp._set_problem()
+    # 6 dots cannot be tiled by distinct shapes, and a 2x4 rectangle can only be tiled by 'sb' and 's<'
+    assert not quadrillion_csp._is_valid_empty_dots(quadrillion_csp._mask_as_value(0b111111))
+    assert quadrillion_csp._is_valid_empty_dots(quadrillion_csp._mask_as_value(dots_to_mask(
+        {(y, x) for y in range(2) for x in range(4)})))
+    assert quadrillion_csp._are_medium_empty_dots_tileable(dict())
+
+    shape_sb = next(shape for shape in quadrillion_csp._variables
+                    if quadrillion_csp._shapes_bits[shape] == SHAPES_BITS['sb'])
+    assert not quadrillion_csp._are_medium_empty_dots_tileable({shape_sb: None})
+
+
+@pytest.mark.parametrize('adapter_class', [QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter])
+def test_cached_solution_is_repaired_after_moving_a_shape(adapter_class):
+    quadrillion = Quadrillion()
+    quadrillion_csp = adapter_class(quadrillion, CSPSolver(), collect_stats=True)
+    cached_solution = quadrillion_csp.find_solution()
+    # move a shape to its placement in the most similar other solution
+    other_solution = min(itertools.islice(quadrillion_csp.iter_solutions(), 1, 50),
+                         key=lambda solution: sum(solution[shape] != cached_solution[shape] for shape in solution))
+    shape = next(shape for shape in other_solution if other_solution[shape] != cached_solution[shape])
+    quadrillion.pick([shape])
+    shape.set_dots(other_solution[shape])
+    quadrillion.release()
+    full_search_csp = adapter_class(quadrillion, CSPSolver(), collect_stats=True)
+    full_search_csp.find_solution()
+
+    quadrillion_csp.apply_solution(quadrillion_csp.find_solution())
+    assert quadrillion.is_won()
+    assert quadrillion_csp.stats.counters['repairs'] == 1
+    assert quadrillion_csp.stats.counters['nodes'] < full_search_csp.stats.counters['nodes']
+
+
+@pytest.mark.parametrize('adapter_class', [QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter])
+def test_symmetric_solutions_are_searched_once(adapter_class):
+    quadrillion = Quadrillion()
+    square = {(y, x) for y in range(1, 6) for x in range(1, 6)}
+    shapes = {shape for shape in quadrillion.shapes if shape.name in ('s1', 's9', 'sC', 'sF', 'sT')}
+    with mock.patch.object(Quadrillion, 'released_empty_grids_dots', new_callable=mock.PropertyMock,
+                           return_value=square),\
+         mock.patch.object(Quadrillion, 'released_unplaced_shapes', new_callable=mock.PropertyMock,
+                           return_value=shapes):
+        quadrillion_csp = adapter_class(quadrillion, collect_stats=True)
+        all_values_csp = adapter_class(quadrillion, collect_stats=True, break_symmetries=False)
+        assert quadrillion_csp.count_solutions() == all_values_csp.count_solutions() == 8
+        assert quadrillion_csp.stats.counters['nodes'] < all_values_csp.stats.counters['nodes']
+        assert quadrillion_csp.count_solutions(limit=3) == 3
+
+        solutions = list(quadrillion_csp.iter_solutions())
+        assert len(solutions) == 8
+        assert all(solution in solutions for solution in all_values_csp.iter_solutions())
+
+
+@pytest.mark.parametrize('adapter_class', [QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter])
+@pytest.mark.parametrize('game_file', saved_games_files[:2])
+def test_numpy_domains_extraction_gives_same_domains(adapter_class, game_file):
+    pytest.importorskip('numpy')
+    quadrillion = Quadrillion()
+    quadrillion.load_game(game_file)
+    quadrillion_csp = adapter_class(quadrillion)
+    quadrillion_csp._set_variables()
+    domains = quadrillion_csp._extract_domains()
+    with mock.patch('quadrillion_csp.np', None):
+        python_domains = quadrillion_csp._extract_domains()
+    assert {shape: list(domain) for shape, domain in domains.items()}\
+        == {shape: list(domain) for shape, domain in python_domains.items()}
+
+
+@pytest.mark.parametrize('adapter_class', [QuadrillionCSPAdapter, QuadrillionBitboardCSPAdapter])
+def test_transposition_table_prunes_subproblems_without_solutions(adapter_class):
+    quadrillion_csp = adapter_class(Quadrillion(), CSPSolver(MostConstrainedItem()), collect_stats=True)
+    no_table_csp = adapter_class(Quadrillion(), CSPSolver(MostConstrainedItem(), transposition_table_size=0),
+                                 collect_stats=True)
+    assert quadrillion_csp.count_solutions(limit=20) == no_table_csp.count_solutions(limit=20) == 20
+    assert quadrillion_csp.stats.counters['transposition_hits'] > 0
+    assert no_table_csp.stats.counters['transposition_hits'] == 0
+    assert quadrillion_csp.stats.counters['nodes'] < no_table_csp.stats.counters['nodes']
+
+
+@pytest.mark.parametrize('schedule', ['luby', 'geometric'])
+def test_restarts_are_reproducible_from_seed(schedule):
+    solutions = []
+    for _ in range(2):
+        quadrillion = Quadrillion()
+        quadrillion.load_game(unique_solution_game_file)
+        solver = RestartSolver(seed=3, schedule=schedule, restart_nodes=5, deterministic_nodes=5)
+        quadrillion_csp = QuadrillionBitboardCSPAdapter(quadrillion, solver, collect_stats=True)
+        quadrillion_csp.solve()
+        assert quadrillion.is_won()
+        assert quadrillion_csp.stats.counters['restarts'] == solver.nr_restarts > 0
+        solutions.append((sorted(frozenset(shape) for shape in quadrillion.shapes), solver.nr_nodes))
+    assert solutions[0] == solutions[1]
+
+
+def test_restarts_respect_budget():
+    quadrillion = Quadrillion()
+    quadrillion.load_game(unique_solution_game_file)
+    solver = RestartSolver(restart_nodes=1, deterministic_nodes=1, budget=Budget(max_nodes=20))
+    with pytest.raises(SearchAbortedException):
+        QuadrillionBitboardCSPAdapter(quadrillion, solver).solve()
+    assert solver.nr_nodes <= 20 + solver.nr_restarts + 1
+
+
 if __name__ == '__main__':
     pytest.main()
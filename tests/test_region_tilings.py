@@ -0,0 +1,43 @@
+import pytest
+from dots_set import DIHEDRAL_TRANSFORMS, transformed_dots
+from region_tilings import SHAPES_BITS, region_key, region_tilings, polyominoes, shapes_orientations, tilings,\
+    build_region_tilings
+
+
+@pytest.mark.parametrize('size, nr_polyominoes', [(4, 5), (5, 12), (6, 35), (7, 108)])
+def test_polyominoes(size, nr_polyominoes):
+    assert len(polyominoes(size)) == nr_polyominoes
+
+
+def test_shapes_orientations_are_unique():
+    orientations = shapes_orientations()
+    assert len(orientations) == len(SHAPES_BITS)
+    assert len(orientations['sF']) == 8
+    assert len(orientations['sT']) == 4
+    assert len(orientations['s2']) == 4
+
+
+def test_tilings_of_rectangle():
+    rectangle = {(y, x) for y in range(2) for x in range(4)}
+    assert tilings(rectangle, shapes_orientations()) == {SHAPES_BITS['sb'] | SHAPES_BITS['s<']}
+    assert tilings({(y, x) for y in range(2) for x in range(3)}, shapes_orientations()) == set()
+
+
+@pytest.mark.parametrize('transform', DIHEDRAL_TRANSFORMS)
+def test_region_key_is_invariant_to_symmetries(transform):
+    region = {(0, 0), (0, 1), (1, 1), (1, 2), (2, 2), (2, 3), (3, 3)}
+    moved_region = {(y + 5, x + 2) for y, x in transformed_dots(region, transform)}
+    assert region_key(moved_region) == region_key(region)
+
+
+def test_stored_table_matches_generated_table():
+    generated_table = build_region_tilings(7)
+    stored_table = region_tilings()
+    assert len(generated_table) == 21
+    assert all(stored_table[key] == region_shapes for key, region_shapes in generated_table.items())
+    assert region_key({(y, x) for y in range(2) for x in range(4)}) in stored_table
+    assert region_key({(0, x) for x in range(8)}) not in stored_table
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,96 @@
+import pytest
+from unittest import mock
+import solution_cache
+from solution_cache import SolutionCache
+from dots_set import DIHEDRAL_TRANSFORMS, transformed_dots, normalized_dots
+from quadrillion import Quadrillion
+from quadrillion_csp import QuadrillionCSPAdapter
+
+
+@pytest.fixture()
+def save_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(solution_cache, 'CACHE_PATH', tmp_path)
+    return tmp_path
+
+
+@pytest.fixture()
+def solved_game(save_path):
+    """
+    :returns: a new game, its empty dots before solving and the cache used to solve it.
+    """
+    cache = SolutionCache()
+    quadrillion = Quadrillion()
+    empty_dots = quadrillion.released_empty_grids_dots
+    QuadrillionCSPAdapter(quadrillion, solution_cache=cache).solve()
+    quadrillion.reset()
+    return quadrillion, empty_dots, cache
+
+
+def assert_is_solution(solution, empty_dots):
+    assert set().union(*solution.values()) == empty_dots
+    assert sum(len(dots) for dots in solution.values()) == len(empty_dots)
+    for shape, dots in solution.items():
+        shape.set_dots(dots)  # raises ValueError if the dots are not a configuration of the shape
+
+
+@pytest.mark.parametrize('transform', DIHEDRAL_TRANSFORMS)
+def test_get_solution_of_transformed_empty_dots(solved_game, transform):
+    quadrillion, empty_dots, cache = solved_game
+    moved_dots = {(y + 20, x + 20) for y, x in transformed_dots(empty_dots, transform)}
+    transformed_empty_dots, _ = normalized_dots(moved_dots)
+
+    solution = cache.get(transformed_empty_dots, quadrillion.shapes)
+    assert_is_solution(solution, transformed_empty_dots)
+
+
+def test_get_missing_solution_returns_none(solved_game):
+    quadrillion, empty_dots, cache = solved_game
+    assert cache.get(empty_dots, set(list(quadrillion.shapes)[1:])) is None
+    assert cache.get(empty_dots - {min(empty_dots)}, quadrillion.shapes) is None
+
+
+def test_adapter_uses_cached_solution(solved_game):
+    quadrillion, empty_dots, cache = solved_game
+    quadrillion_csp = QuadrillionCSPAdapter(quadrillion, solution_cache=cache)
+    with mock.patch.object(quadrillion_csp, '_csp_solver') as solver_mock:
+        quadrillion_csp.solve()
+        assert solver_mock.call_count == 0
+    assert quadrillion.is_won()
+
+
+def test_cache_is_saved_on_disk(solved_game):
+    quadrillion, empty_dots, cache = solved_game
+    assert len(SolutionCache()) == 0
+    cache.save()
+    assert len(SolutionCache()) == 1
+    assert len(SolutionCache(file_name=None)) == 0
+    assert_is_solution(SolutionCache().get(empty_dots, quadrillion.shapes), empty_dots)
+
+
+def test_cache_is_saved_after_save_interval_solutions(save_path):
+    cache = SolutionCache(save_interval=2)
+    shape = min(Quadrillion().shapes, key=len)
+    cache.put({(0, 0)}, {shape: {(0, 0)}})
+    assert not (save_path / 'solutions_cache.pickle').exists()
+    cache.put({(0, 0), (0, 1)}, {shape: {(0, 0), (0, 1)}})
+    assert len(SolutionCache()) == 2
+
+
+def test_least_recently_used_solution_is_evicted(save_path):
+    cache = SolutionCache(max_size=2)
+    shape = Quadrillion().shapes
+    shape = min(shape, key=len)
+    solutions = [{shape: {(0, 0), (0, 1), (1, 0)}}, {shape: {(0, 0), (1, 0), (2, 0)}}]
+    solutions.append({shape: {(0, 0), (0, 1), (0, 2)}})  # the same as the second up to rotation
+    cache.put(solutions[0][shape], solutions[0])
+    cache.put(solutions[1][shape], solutions[1])
+    cache.get(solutions[0][shape], [shape])
+    cache.put({(0, 0)}, {shape: {(0, 0)}})
+
+    assert len(cache) == 2
+    assert cache.get(solutions[0][shape], [shape]) is not None
+    assert cache.get(solutions[2][shape], [shape]) is None
+
+
+if __name__ == '__main__':
+    pytest.main()